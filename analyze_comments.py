@@ -1,92 +1,403 @@
+import argparse
+import heapq
 import json
+import re
 from collections import Counter
+from datetime import datetime, timedelta
 import os
 
-def analyze_comments(file_path):
+from keyword_matcher import KeywordMatcher
+
+# Keyword analysis of one video's comments, top-level comments and replies alike.
+# Input is streamed: comments.json is decoded one thread at a time and the
+# comments.jsonl log next to it (see comment_store.py) is replayed record by
+# record, so memory stays flat however large the file is.
+#
+#   python analyze_comments.py scraped_data/<video_id>
+#   python analyze_comments.py comments.json --keywords keywords.tsv --no-list
+
+# Heuristic list of negative/sarcastic keywords based on context. Used when no
+# keyword file is given; see keyword_matcher.py for the file format.
+NEGATIVE_KEYWORDS = [
+    "基本盘", "信息茧房", "遥遥领先", "赢", "赢麻了",
+    "偷着乐", "下大棋", "感恩", "耗材", "人矿", "软肋",
+    "奴役", "失业", "骂", "脑子", "低保", "糖霜苹果",
+    "质疑", "无脑", "1450", "行走的50w", "润",
+    "回旋镖", "这就是中国", "偷国"
+]
+
+def load_matcher(keywords_path=None):
+    if keywords_path:
+        return KeywordMatcher.from_file(keywords_path, default_category="negative")
+    return KeywordMatcher(NEGATIVE_KEYWORDS, default_category="negative")
+
+def iter_json_array(path, chunk_size=1 << 16):
+    """Yields the elements of the top-level JSON array in path, reading chunk_size characters at a time."""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buf = f.read(chunk_size).lstrip()
+        if not buf.startswith("["):
+            raise ValueError(f"{path} is not a JSON array")
+        pos = 1
+        eof = False
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buf) and buf[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except ValueError:
+                end = None
+            # An element ending exactly at the buffer edge may continue in the next chunk
+            if end is None or (end == len(buf) and not eof):
+                if eof:
+                    raise ValueError(f"{path} ends inside an element")
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buf = buf[pos:] + chunk
+                pos = 0
+                continue
+            yield item
+            pos = end
+
+def _read_log_record(f, offset):
+    f.seek(offset)
+    return json.loads(f.readline())
+
+def iter_threads(path):
+    """Yields (index, comment, replies) for every thread of a video, lazily.
+
+    path is a video directory or its comments.json. A comments.jsonl log next
+    to it is applied on top, as CommentStore.load() would: its added comments
+    follow the saved ones, and a thread whose replies were updated in the log
+    gets its last logged reply list instead of the saved one. Only the byte
+    offsets of those updates are kept in memory.
+    """
+    target_dir = path if os.path.isdir(path) else os.path.dirname(path) or "."
+    json_path = os.path.join(target_dir, "comments.json") if os.path.isdir(path) else path
+    log_path = os.path.join(target_dir, "comments.jsonl")
+    has_json = os.path.exists(json_path)
+    has_log = os.path.exists(log_path)
+    if not has_json and not has_log:
+        raise FileNotFoundError(json_path)
+
+    base = 0
+    latest_replies = {}  # thread index -> offset of its last replies update
+    if has_log:
+        with open(log_path, 'rb') as f:
+            offset = 0
+            added = 0
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn final line from a crash mid-write
+                    break
+                op = record.get("op")
+                if op == "base":
+                    base = record.get("count", 0)
+                elif op == "add":
+                    added += 1
+                elif op == "update" and "replies" in record.get("fields", {}):
+                    latest_replies[record["index"]] = offset
+                offset += len(line)
+
+    log = open(log_path, 'rb') if has_log else None
+    try:
+        def replies_for(index, comment):
+            if index in latest_replies:
+                return _read_log_record(log, latest_replies[index])["fields"]["replies"]
+            return comment.get("replies", [])
+
+        count = 0
+        if has_json:
+            for index, comment in enumerate(iter_json_array(json_path)):
+                yield index, comment, replies_for(index, comment)
+                count += 1
+        if not has_log:
+            return
+        if count != base:
+            # comments.json was compacted after this log was written; CommentStore drops it too
+            print(f"Ignoring stale {log_path} (built on {base} comments, found {count}).")
+            return
+
+        index = count
+        with open(log_path, 'rb') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if record.get("op") == "add":
+                    comment = record["comment"]
+                    yield index, comment, replies_for(index, comment)
+                    index += 1
+    finally:
+        if log:
+            log.close()
+
+def _speaker(name):
+    # Douyin marks the video author's name with " [Author]", in user and reply_to alike
+    return (name or "").replace(" [Author]", "").strip()
+
+def iter_thread_comments(comment, replies):
+    """Yields (depth, record) for a thread: the top-level comment at depth 0, then its replies.
+
+    Douyin stores a thread's replies flat; a reply addressed to another
+    replier ("A ▸ B") sits one level below B's latest reply in the thread.
+    Replies that carry their own "replies" list are walked recursively.
+    """
+    yield 0, comment
+    depth_of = {_speaker(comment.get("user")): 0}
+
+    def walk(items, parent_depth):
+        for reply in items:
+            depth = parent_depth + 1
+            reply_to = reply.get("reply_to")
+            if reply_to:
+                depth = max(depth, depth_of.get(_speaker(reply_to), parent_depth) + 1)
+            depth_of[_speaker(reply.get("user"))] = depth
+            yield depth, reply
+            if reply.get("replies"):
+                yield from walk(reply["replies"], depth)
+
+    yield from walk(replies, 0)
+
+_ABSOLUTE_DATE = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})")
+_MONTH_DAY = re.compile(r"^(\d{1,2})-(\d{1,2})")
+_RELATIVE = re.compile(r"(\d+)\s*(秒|分钟|小时|天|周)前")
+_RELATIVE_UNITS = {"秒": "seconds", "分钟": "minutes", "小时": "hours", "天": "days", "周": "weeks"}
+_CLOCK = re.compile(r"(\d{1,2}):(\d{2})")
+
+def comment_time(record):
+    """Best-effort (date, hour) of a comment; either may be None.
+
+    API captures store "YYYY-MM-DD HH:MM"; DOM captures store what Douyin
+    displays ("刚刚", "3小时前", "昨天 12:30", "10-05"), which is resolved
+    against the record's scrape_time.
+    """
+    text = (record.get("time") or "").strip()
+    if not text:
+        return None, None
+    clock = _CLOCK.search(text)
+    hour = int(clock.group(1)) if clock else None
+    match = _ABSOLUTE_DATE.search(text)
+    if match:
+        return "%04d-%02d-%02d" % tuple(int(g) for g in match.groups()), hour
+    try:
+        scraped = datetime.strptime(record.get("scrape_time", ""), "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return None, hour
+    match = _MONTH_DAY.match(text)
+    if match:
+        month, day = int(match.group(1)), int(match.group(2))
+        try:
+            when = scraped.replace(month=month, day=day)
+            if when > scraped:
+                when = when.replace(year=scraped.year - 1)
+        except ValueError:
+            return None, hour
+        return when.strftime("%Y-%m-%d"), hour
+    match = _RELATIVE.search(text)
+    if match:
+        unit = match.group(2)
+        when = scraped - timedelta(**{_RELATIVE_UNITS[unit]: int(match.group(1))})
+        # Sub-day offsets pin down the hour too
+        return when.strftime("%Y-%m-%d"), when.hour if unit in ("秒", "分钟", "小时") else hour
+    if "刚刚" in text:
+        return scraped.strftime("%Y-%m-%d"), scraped.hour
+    for word, days in (("今天", 0), ("昨天", 1), ("前天", 2)):
+        if word in text:
+            return (scraped - timedelta(days=days)).strftime("%Y-%m-%d"), hour
+    return None, hour
+
+class CommentAnalysis:
+    """Running keyword statistics over a stream of threads.
+
+    Memory grows with the number of distinct users, keywords, locations and
+    days seen, never with the number of comments. Analyses of different
+    videos combine with merge(); to_dict() is their JSON/pickle form.
+    """
+
+    COUNTERS = ("negative_by_location", "locations", "keyword_counts", "category_counts", "comments_by_depth",
+                "negative_by_depth", "users", "negative_users", "comments_by_day", "negative_by_day",
+                "comments_by_hour")
+
+    def __init__(self, matcher, top_threads=10, on_match=None):
+        self.matcher = matcher
+        self.on_match = on_match
+        self.total = 0
+        self.negative = 0
+        self.threads = 0
+        for name in self.COUNTERS:
+            setattr(self, name, Counter())
+        self.top_threads = top_threads
+        self._thread_heap = []  # min-heap of (negative, comments, index, user, content)
+
+    def add_thread(self, index, comment, replies):
+        self.threads += 1
+        thread_total = 0
+        thread_negative = 0
+        for depth, record in iter_thread_comments(comment, replies):
+            content = record.get('content', '') or ''
+            if not content.strip():
+                continue
+            thread_total += 1
+            user = record.get('user', 'Anon')
+            location = record.get('location') or 'Unknown'
+            day, hour = comment_time(record)
+            self.comments_by_depth[depth] += 1
+            self.users[user] += 1
+            self.locations[location] += 1
+            self.comments_by_day[day or 'unknown'] += 1
+            if hour is not None:
+                self.comments_by_hour[hour] += 1
+            # One pass over the content finds every keyword occurrence
+            hits = self.matcher.find_all(content)
+            if not hits:
+                continue
+            thread_negative += 1
+            self.negative_by_depth[depth] += 1
+            self.negative_by_location[location] += 1
+            self.negative_users[user] += 1
+            self.negative_by_day[day or 'unknown'] += 1
+            self.keyword_counts.update(hit.term for hit in hits)
+            self.category_counts.update(hit.category for hit in hits)
+            if self.on_match:
+                self.on_match(index, depth, record, hits)
+        self.total += thread_total
+        self.negative += thread_negative
+        if thread_negative and self.top_threads:
+            entry = (thread_negative, thread_total, -index, comment.get('user', 'Anon'), comment.get('content', ''))
+            if len(self._thread_heap) < self.top_threads:
+                heapq.heappush(self._thread_heap, entry)
+            else:
+                heapq.heappushpop(self._thread_heap, entry)
+
+    def merge(self, other):
+        """Adds another analysis (or its to_dict()) into this one. Thread rankings are not merged."""
+        if isinstance(other, CommentAnalysis):
+            other = other.to_dict()
+        self.threads += other["threads"]
+        self.total += other["comments"]
+        self.negative += other["negative"]
+        for name in self.COUNTERS:
+            getattr(self, name).update(other[name])
+        return self
+
+    def to_dict(self, top=None):
+        """Plain-dict form; top limits each counter to its most common entries (full counts by default)."""
+        result = {"threads": self.threads, "comments": self.total, "negative": self.negative}
+        for name in self.COUNTERS:
+            counter = getattr(self, name)
+            result[name] = dict(counter.most_common(top)) if top else dict(counter)
+        # Days and hours read better in order than by count
+        for name in ("comments_by_day", "negative_by_day", "comments_by_hour", "comments_by_depth", "negative_by_depth"):
+            result[name] = dict(sorted(result[name].items(), key=lambda kv: str(kv[0]).zfill(2)))
+        result["top_threads"] = [
+            {"index": -index, "negative": negative, "comments": total, "user": user, "content": content}
+            for negative, total, index, user, content in sorted(self._thread_heap, reverse=True)]
+        return result
+
+    def print_report(self):
+        print("\n" + "="*40)
+        print("NEGATIVE COMMENTS SUMMARY BY LOCATION")
+        print("="*40)
+        if self.negative_by_location:
+            for loc, count in self.negative_by_location.most_common():
+                print(f"{loc:<10}: {count} negative comments")
+        else:
+            print("No negative comments found based on keywords.")
+
+        if self.keyword_counts:
+            print("\nTOP KEYWORDS")
+            for kw, count in self.keyword_counts.most_common(20):
+                print(f"{kw:<10}: {count} hits")
+            if len(self.category_counts) > 1:
+                print("\nHITS BY CATEGORY")
+                for category, count in self.category_counts.most_common():
+                    print(f"{category:<10}: {count} hits")
+
+        print("\nBY REPLY DEPTH (0 = top-level)")
+        for depth in sorted(self.comments_by_depth):
+            total = self.comments_by_depth[depth]
+            negative = self.negative_by_depth[depth]
+            print(f"depth {depth:<4}: {total} comments, {negative} negative ({negative/total*100:.1f}%)")
+
+        if self.users:
+            print("\nTOP USERS (comments, negative)")
+            for user, count in self.users.most_common(10):
+                print(f"{user[:20]:<20}: {count}, {self.negative_users[user]}")
+            if self.negative_users:
+                print("\nTOP NEGATIVE USERS")
+                for user, count in self.negative_users.most_common(10):
+                    print(f"{user[:20]:<20}: {count} of {self.users[user]}")
+
+        dated = sorted(day for day in self.comments_by_day if day != 'unknown')
+        if dated:
+            print(f"\nCOMMENTS BY DAY ({dated[0]} .. {dated[-1]}, {self.comments_by_day['unknown']} undated)")
+            peak = max(self.comments_by_day[day] for day in dated)
+            for day in dated[-30:]:
+                count = self.comments_by_day[day]
+                bar = "#" * max(1, round(count / peak * 40))
+                print(f"{day}: {count:>6} ({self.negative_by_day[day]} negative) {bar}")
+
+        if self._thread_heap:
+            print(f"\nMOST NEGATIVE THREADS (top {len(self._thread_heap)})")
+            for negative, total, index, user, content in sorted(self._thread_heap, reverse=True):
+                display_content = (content[:30] + '..') if len(content) > 30 else content
+                print(f"#{-index:<5} {negative}/{total} negative  {user}: {display_content}")
+
+        print(f"\nThreads: {self.threads}")
+        print(f"Total Analyzed: {self.total} (replies: {self.total - self.comments_by_depth[0]})")
+        if self.total:
+            print(f"Total Negative: {self.negative} ({self.negative/self.total*100:.1f}%)")
+        print(f"Keywords Checked: {len(self.matcher)} ({', '.join(self.matcher.categories)})")
+
+def _print_match(index, depth, record, hits):
+    loc = record.get('location', 'Unknown')
+    user = record.get('user', 'Anon')
+    matched = ", ".join(dict.fromkeys(hit.term for hit in hits))
+    score = sum(hit.weight for hit in hits)
+    indent = "    " * depth
+    print(f"{indent}[#{index} {loc}] {user}: {record.get('content', '')}")
+    print(f"{indent}   -> Matched: {matched} (score {score:g})")
+    print("-" * 40)
+
+def analyze_comments(file_path, keywords_path=None, list_matches=True):
+    """file_path: a comments.json or a scraped_data/<video_id> directory."""
     if not os.path.exists(file_path):
         print(f"Error: {file_path} not found.")
         return
 
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            comments = json.load(f)
-    except Exception as e:
-        print(f"Error reading JSON: {e}")
+        matcher = load_matcher(keywords_path)
+    except OSError as e:
+        print(f"Error reading keywords: {e}")
+        return
+
+    analysis = CommentAnalysis(matcher, on_match=_print_match if list_matches else None)
+    print(f"Analyzing {file_path} against {len(matcher)} keywords...\n")
+    if list_matches:
+        print("="*80)
+        print("LIST OF NEGATIVE COMMENTS")
+        print("="*80)
+
+    try:
+        for index, comment, replies in iter_threads(file_path):
+            analysis.add_thread(index, comment, replies)
+    except (OSError, ValueError) as e:
+        print(f"Error reading comments: {e}")
         return
 
-    # Heuristic list of negative/sarcastic keywords based on context
-    NEGATIVE_KEYWORDS = [
-        "基本盘", "信息茧房", "遥遥领先", "赢", "赢麻了", 
-        "偷着乐", "下大棋", "感恩", "耗材", "人矿", "软肋", 
-        "奴役", "失业", "骂", "脑子", "低保", "糖霜苹果", 
-        "质疑", "无脑", "1450", "行走的50w", "润", 
-        "回旋镖", "这就是中国", "偷国"
-    ]
-
-    negative_by_location = Counter()
-    total_comments = len(comments)
-    negative_count = 0
-
-    print(f"Analyzing {total_comments} comments using Keyword Matching...\n")
-    print(f"{'User':<20} | {'Sentiment':<10} | {'Location':<10} | {'Content'}")
-    print("-" * 100)
-
-    for comment in comments:
-        content = comment.get('content', '')
-        location = comment.get('location', 'Unknown')
-        
-        if not content.strip():
-            continue
-            
-        is_negative = False
-        matched_keyword = ""
-        
-        for kw in NEGATIVE_KEYWORDS:
-            if kw in content:
-                is_negative = True
-                matched_keyword = kw
-                break
-        
-        sentiment_str = "Neutral"
-        if is_negative:
-            sentiment_str = "Negative"
-            negative_count += 1
-            negative_by_location[location] += 1
-            # Print negative comment details immediately or store for listing
-            
-        # Truncate content for table display
-        display_content = (content[:30] + '..') if len(content) > 30 else content
-        # print(f"{comment.get('user', 'Anon')[:20]:<20} | ...") # Commenting out table for now to focus on list
-    
-    print("\n" + "="*80)
-    print(f"LIST OF NEGATIVE COMMENTS ({negative_count})")
-    print("="*80)
-    
-    for comment in comments:
-        content = comment.get('content', '')
-        # Re-check logic for printing (inefficient but simple given script structure)
-        for kw in NEGATIVE_KEYWORDS:
-             if kw in content:
-                 loc = comment.get('location', 'Unknown')
-                 user = comment.get('user', 'Anon')
-                 print(f"[{loc}] {user}: {content}")
-                 print(f"   -> Matched: {kw}")
-                 print("-" * 40)
-                 break
-
-    print("\n" + "="*40)
-    print("NEGATIVE COMMENTS SUMMARY BY LOCATION")
-    print("="*40)
-    if negative_by_location:
-        for loc, count in negative_by_location.most_common():
-            # Calculate percentage
-            print(f"{loc:<10}: {count} negative comments")
-    else:
-        print("No negative comments found based on keywords.")
-    
-    print(f"\nTotal Analyzed: {total_comments}")
-    print(f"Total Negative: {negative_count} ({negative_count/total_comments*100:.1f}%)")
-    print(f"Keywords Checked: {', '.join(NEGATIVE_KEYWORDS)}")
+    analysis.print_report()
+    return analysis
 
 if __name__ == "__main__":
-    analyze_comments("comments.json")
+    parser = argparse.ArgumentParser(description="Keyword analysis of scraped comments and their replies.")
+    parser.add_argument("file", nargs="?", default="comments.json", help="comments.json or a scraped_data/<video_id> directory")
+    parser.add_argument("--keywords", help="Keyword file: term[<TAB>category[<TAB>weight]] per line")
+    parser.add_argument("--no-list", action="store_true", help="Only print the summary, not every matching comment")
+    args = parser.parse_args()
+    analyze_comments(args.file, args.keywords, list_matches=not args.no_list)
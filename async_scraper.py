@@ -0,0 +1,69 @@
+import asyncio
+import os
+import time
+from dotenv import load_dotenv
+from playwright.async_api import async_playwright
+
+from scrape_douyin import launch_douyin_context, scrape_douyin_comments_async, verify_login_status_async
+from browser_service import read_state, login_recently_verified
+
+load_dotenv()
+
+# Many videos from one process and one browser: scrape_douyin_comments_async
+# runs once per video, each in its own page of a shared context, with up to
+# `concurrency` of them in flight on one event loop. Every wait (scroll,
+# expansion, captcha, login) yields to the loop, so while one page waits for
+# the comment API the others keep scrolling.
+#
+# scrape_many() is the blocking entry point for sync callers; batch_scrape.py is
+# the command line for it.
+
+async def scrape_many_async(urls, concurrency=3, capture=None, resource_profile=None, on_event=None, **scrape_kwargs):
+    """Scrapes urls with up to `concurrency` pages in flight in one browser. Returns result tuples.
+
+    Attaches to the douyin browser service if one is running, otherwise
+    launches the persistent profile. Remaining keyword arguments go to
+    scrape_douyin_comments_async.
+    """
+    user_data_dir = os.path.join(os.getcwd(), "douyin_user_data")
+    results = []
+    async with async_playwright() as p:
+        state = await asyncio.to_thread(read_state, "douyin")
+        if state:
+            browser = await p.chromium.connect_over_cdp(state["endpoint"])
+            context = browser.contexts[0]
+            owns_context = False
+            print(f"Attached to douyin browser service at {state['endpoint']}")
+        else:
+            context = await launch_douyin_context(p, user_data_dir)
+            owns_context = True
+
+        # Verify the login once up front so every page starts from a logged-in profile
+        if owns_context or not await asyncio.to_thread(login_recently_verified, "douyin"):
+            page = context.pages[0] if context.pages else await context.new_page()
+            await page.goto("https://www.douyin.com/", timeout=60000)
+            await verify_login_status_async(page)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(url):
+            async with semaphore:
+                started = time.time()
+                try:
+                    await scrape_douyin_comments_async(url, capture=capture, context=context,
+                                                       resource_profile=resource_profile, on_event=on_event,
+                                                       verify_login=False, **scrape_kwargs)
+                    results.append((url, True, time.time() - started, None))
+                except Exception as e:
+                    print(f"FAILED {url}: {e}")
+                    results.append((url, False, time.time() - started, str(e)))
+
+        await asyncio.gather(*(run(url) for url in urls))
+        if owns_context:
+            await context.close()
+            print("Browser context closed and session saved.")
+    return results
+
+def scrape_many(urls, concurrency=3, capture=None, resource_profile=None, on_event=None, **scrape_kwargs):
+    """Blocking wrapper around scrape_many_async for sync callers."""
+    return asyncio.run(scrape_many_async(urls, concurrency, capture, resource_profile, on_event, **scrape_kwargs))
@@ -0,0 +1,48 @@
+import argparse
+import os
+from dotenv import load_dotenv
+
+from async_scraper import scrape_many
+from image_downloader import get_image_downloader
+from scrape_metrics import start_metrics_server
+from video_ids import dedupe_by_video, load_urls
+
+load_dotenv()
+
+# Command-line entry point for scraping many videos: every URL runs through
+# async_scraper.scrape_many, i.e. up to --concurrency pages of one browser on
+# one event loop.
+#
+#   python batch_scrape.py -c 8 -f urls.txt --metrics-port 9100
+
+def batch_scrape(urls, concurrency=3, capture=None, resource_profile=None):
+    """Scrapes many videos with one browser launch and up to `concurrency` tabs at once."""
+    urls = dedupe_by_video(urls)
+    results = scrape_many(urls, concurrency=concurrency, capture=capture, resource_profile=resource_profile)
+    get_image_downloader().wait()
+
+    ok = [r for r in results if r[1]]
+    print(f"\nBatch complete: {len(ok)}/{len(urls)} videos scraped.")
+    for url, success, duration, error in results:
+        status = "OK  " if success else "FAIL"
+        print(f"  {status} {duration:7.1f}s  {url}" + (f"  ({error})" if error else ""))
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape comments for many Douyin videos with one browser.")
+    parser.add_argument("urls", nargs="*", help="Video URLs")
+    parser.add_argument("-f", "--file", help="File with one URL per line")
+    parser.add_argument("-c", "--concurrency", type=int, default=int(os.getenv("BATCH_CONCURRENCY", "3")))
+    parser.add_argument("--capture", choices=["dom", "network"], default=None)
+    parser.add_argument("--resource-profile", default=None, help="full, comments-only or api-only (default: RESOURCE_PROFILE env)")
+    parser.add_argument("--metrics-port", type=int, default=int(os.getenv("METRICS_PORT", "0")),
+                        help="Serve Prometheus metrics on this port while the batch runs")
+    args = parser.parse_args()
+
+    url_list = load_urls(args.urls, args.file)
+    if not url_list:
+        parser.error("no URLs given")
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+    batch_scrape(url_list, concurrency=args.concurrency, capture=args.capture,
+                 resource_profile=args.resource_profile)
@@ -0,0 +1,135 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from douyin_fixture_server import FixtureConfig, start_fixture_server
+
+# End-to-end throughput benchmark: runs scrape_douyin_comments against the local
+# stand-in server and reports comments/sec, replies/sec, peak RSS and completeness.
+# Every scenario runs in a fresh process, since ru_maxrss is a per-process
+# high-water mark and would otherwise carry the largest earlier run forward.
+#
+#   BROWSER_CHANNEL= python benchmark_scraper.py --scenarios 1k,10k
+#   python benchmark_scraper.py --json bench.json --baseline last_bench.json
+
+SCENARIOS = {
+    "1k": 1000,
+    "10k": 10000,
+    "100k": 100000,
+}
+
+def _peak_rss_mb(who):
+    rss = resource.getrusage(who).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+def _count_replies(comments):
+    return sum(len(c.get("replies", [])) for c in comments)
+
+def run_scenario(name, comments, latency_ms, capture, captcha_after):
+    """Scrapes one stand-in video in a scratch directory and returns its report row."""
+    from scrape_douyin import scrape_douyin_comments
+
+    config = FixtureConfig(comments=comments, latency_ms=latency_ms, captcha_after=captcha_after)
+    expected_comments, expected_replies = config.expected_totals()
+    server, base_url = start_fixture_server(config)
+    video_id = f"bench-{name}"
+
+    work_dir = tempfile.mkdtemp(prefix=f"douyin_bench_{name}_")
+    cwd = os.getcwd()
+    os.chdir(work_dir)  # scraped_data/ and the browser profile land in the scratch dir
+    try:
+        started = time.time()
+        scrape_douyin_comments(f"{base_url}/video/{video_id}", capture=capture)
+        elapsed = time.time() - started
+        with open(os.path.join(work_dir, "scraped_data", video_id, "comments.json"), 'r', encoding='utf-8') as f:
+            scraped = json.load(f)
+    finally:
+        os.chdir(cwd)
+        server.shutdown()
+
+    replies = _count_replies(scraped)
+    return {
+        "scenario": name,
+        "capture": capture,
+        "latency_ms": latency_ms,
+        "seconds": round(elapsed, 2),
+        "comments": len(scraped),
+        "replies": replies,
+        "comments_per_sec": round(len(scraped) / elapsed, 2) if elapsed else 0,
+        "replies_per_sec": round(replies / elapsed, 2) if elapsed else 0,
+        "comment_completeness": round(len(scraped) / expected_comments, 4) if expected_comments else 1.0,
+        "reply_completeness": round(replies / expected_replies, 4) if expected_replies else 1.0,
+        "peak_rss_mb_python": round(_peak_rss_mb(resource.RUSAGE_SELF), 1),
+        "peak_rss_mb_children": round(_peak_rss_mb(resource.RUSAGE_CHILDREN), 1),
+        "output_dir": work_dir,
+    }
+
+def run_isolated(name, comments, latency_ms, capture, captcha_after):
+    """run_scenario in a freshly spawned process, so its peak RSS figures are its own."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(run_scenario, name, comments, latency_ms, capture, captcha_after).result()
+
+def compare_to_baseline(results, baseline_path, max_regression):
+    """Returns a list of human-readable regressions versus a previous --json report."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {(r["scenario"], r["capture"]): r for r in json.load(f)}
+    regressions = []
+    for r in results:
+        old = baseline.get((r["scenario"], r["capture"]))
+        if not old:
+            continue
+        for metric in ("comments_per_sec", "replies_per_sec", "comment_completeness", "reply_completeness"):
+            if old[metric] and r[metric] < old[metric] * (1 - max_regression):
+                regressions.append(f"{r['scenario']}/{r['capture']}: {metric} {old[metric]} -> {r[metric]}")
+    return regressions
+
+def print_report(results):
+    print("\n" + "=" * 100)
+    print(f"{'Scenario':<8} {'Mode':<8} {'Secs':>8} {'Comments':>9} {'Replies':>8} {'C/s':>8} {'R/s':>8} "
+          f"{'C%':>7} {'R%':>7} {'RSS py':>8} {'RSS br':>8}")
+    print("-" * 100)
+    for r in results:
+        print(f"{r['scenario']:<8} {r['capture']:<8} {r['seconds']:>8} {r['comments']:>9} {r['replies']:>8} "
+              f"{r['comments_per_sec']:>8} {r['replies_per_sec']:>8} "
+              f"{r['comment_completeness'] * 100:>6.1f}% {r['reply_completeness'] * 100:>6.1f}% "
+              f"{r['peak_rss_mb_python']:>7.0f}M {r['peak_rss_mb_children']:>7.0f}M")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark scrape_douyin_comments against the local stand-in server.")
+    parser.add_argument("--scenarios", default="1k", help=f"Comma-separated, from {', '.join(SCENARIOS)}")
+    parser.add_argument("--capture", default="dom", help="Comma-separated capture modes (dom, network)")
+    parser.add_argument("--latency-ms", type=int, default=150, help="Simulated API latency")
+    parser.add_argument("--captcha-after", type=int, default=0, help="Show a captcha overlay after N comment pages")
+    parser.add_argument("--json", help="Write the machine-readable report here")
+    parser.add_argument("--baseline", help="Previous --json report to check for regressions")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed relative drop vs baseline")
+    args = parser.parse_args()
+
+    os.environ.setdefault("HEADLESS", "true")
+    results = []
+    for scenario in args.scenarios.split(","):
+        for capture in args.capture.split(","):
+            print(f"\n>>> Scenario {scenario} ({SCENARIOS[scenario]} comments), capture={capture}")
+            results.append(run_isolated(scenario, SCENARIOS[scenario], args.latency_ms, capture, args.captcha_after))
+
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nReport written to {args.json}")
+
+    if args.baseline:
+        regressions = compare_to_baseline(results, args.baseline, args.max_regression)
+        if regressions:
+            print("\nREGRESSIONS:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions versus baseline.")
@@ -0,0 +1,215 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import time
+import urllib.request
+from datetime import datetime
+from dotenv import load_dotenv
+from playwright.async_api import async_playwright
+
+load_dotenv()
+
+# Long-lived browser per profile directory. Scrape jobs attach to it over CDP
+# (open_session for sync_playwright tools, open_session_async for the douyin
+# scraper) instead of cold-starting Chrome and re-checking the login:
+#
+#   python browser_service.py douyin     # keep running in its own terminal
+#   python scrape_douyin.py              # attaches in well under a second
+
+PROFILES = {
+    "douyin": {
+        "user_data_dir": "douyin_user_data",
+        "port": 9333,
+        "home": "https://www.douyin.com/",
+    },
+    "wechat": {
+        "user_data_dir": "wechat_user_data",
+        "port": 9334,
+        "home": "https://channels.weixin.qq.com/platform/interaction/comment",
+    },
+}
+
+STATE_FILE = ".browser_service.json"
+CLAIM_JS = "() => { if (window.__scrapeClaimed) return false; window.__scrapeClaimed = true; return true; }"
+
+def _state_path(profile):
+    return os.path.join(os.getcwd(), PROFILES[profile]["user_data_dir"], STATE_FILE)
+
+def _endpoint_alive(endpoint, timeout=0.5):
+    try:
+        with urllib.request.urlopen(f"{endpoint}/json/version", timeout=timeout) as response:
+            return response.status == 200
+    except Exception:
+        return False
+
+def read_state(profile):
+    """Returns the running service's state for profile, or None if no live service."""
+    path = _state_path(profile)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except Exception:
+        return None
+    if not _endpoint_alive(state.get("endpoint", "")):
+        return None
+    return state
+
+def _write_state(profile, state):
+    path = _state_path(profile)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+def login_recently_verified(profile, ttl_hours=None):
+    """True if the running service verified the login within ttl_hours (SERVICE_LOGIN_TTL, default 6)."""
+    state = read_state(profile)
+    if not state or not state.get("login_verified_at"):
+        return False
+    if ttl_hours is None:
+        ttl_hours = float(os.getenv("SERVICE_LOGIN_TTL", "6"))
+    return time.time() - state["login_verified_at"] < ttl_hours * 3600
+
+def _claim_warm_page(context):
+    """Takes one of the service's pre-warmed blank tabs, or opens a new one."""
+    for page in context.pages:
+        if page.url == "about:blank":
+            try:
+                if page.evaluate(CLAIM_JS):
+                    return page
+            except Exception:
+                continue
+    return context.new_page()
+
+def open_session(p, profile, launch):
+    """Returns (context, page, owns_context).
+
+    Attaches to the running service for profile if there is one (the caller
+    must only close its page); otherwise calls launch(p) to start a browser the
+    caller owns and must close.
+    """
+    state = read_state(profile)
+    if state:
+        try:
+            started = time.time()
+            browser = p.chromium.connect_over_cdp(state["endpoint"])
+            context = browser.contexts[0]
+            page = _claim_warm_page(context)
+            print(f"Attached to {profile} browser service at {state['endpoint']} in {time.time() - started:.2f}s")
+            return context, page, False
+        except Exception as e:
+            print(f"Browser service attach failed ({e}); launching a private browser instead.")
+    context = launch(p)
+    page = context.pages[0] if context.pages else context.new_page()
+    return context, page, True
+
+async def _claim_warm_page_async(context):
+    for page in context.pages:
+        if page.url == "about:blank":
+            try:
+                if await page.evaluate(CLAIM_JS):
+                    return page
+            except Exception:
+                continue
+    return await context.new_page()
+
+async def open_session_async(p, profile, launch):
+    """open_session for playwright.async_api; launch(p) returns an awaitable context."""
+    state = await asyncio.to_thread(read_state, profile)
+    if state:
+        try:
+            started = time.time()
+            browser = await p.chromium.connect_over_cdp(state["endpoint"])
+            context = browser.contexts[0]
+            page = await _claim_warm_page_async(context)
+            print(f"Attached to {profile} browser service at {state['endpoint']} in {time.time() - started:.2f}s")
+            return context, page, False
+        except Exception as e:
+            print(f"Browser service attach failed ({e}); launching a private browser instead.")
+    context = await launch(p)
+    page = context.pages[0] if context.pages else await context.new_page()
+    return context, page, True
+
+async def _launch_for_service(p, profile, port):
+    user_data_dir = os.path.join(os.getcwd(), PROFILES[profile]["user_data_dir"])
+    if profile == "douyin":
+        from scrape_douyin import launch_douyin_context
+        return await launch_douyin_context(p, user_data_dir, remote_debugging_port=port)
+    return await p.chromium.launch_persistent_context(
+        user_data_dir,
+        headless=False,
+        viewport={'width': 1440, 'height': 900},
+        args=[f"--remote-debugging-port={port}"]
+    )
+
+async def _top_up_warm_tabs(context, warm_tabs):
+    blank = 0
+    for page in context.pages:
+        if page.url == "about:blank":
+            try:
+                if not await page.evaluate("() => !!window.__scrapeClaimed"):
+                    blank += 1
+            except Exception:
+                pass
+    for _ in range(warm_tabs - blank):
+        await context.new_page()
+
+def serve(profile, warm_tabs=2, port=None):
+    """Runs the browser service for profile until interrupted."""
+    if read_state(profile):
+        print(f"A {profile} browser service is already running.")
+        return
+    try:
+        asyncio.run(_serve(profile, warm_tabs, port or PROFILES[profile]["port"]))
+    except KeyboardInterrupt:
+        pass
+
+async def _serve(profile, warm_tabs, port):
+    endpoint = f"http://127.0.0.1:{port}"
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+
+    async with async_playwright() as p:
+        context = await _launch_for_service(p, profile, port)
+        page = context.pages[0] if context.pages else await context.new_page()
+        await page.goto(PROFILES[profile]["home"], timeout=60000)
+
+        login_verified_at = None
+        if profile == "douyin":
+            from scrape_douyin import verify_login_status_async
+            await verify_login_status_async(page)
+            login_verified_at = time.time()
+
+        state = {
+            "profile": profile,
+            "pid": os.getpid(),
+            "endpoint": endpoint,
+            "started": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "login_verified_at": login_verified_at,
+        }
+        _write_state(profile, state)
+        print(f"{profile} browser service ready at {endpoint} ({warm_tabs} warm tabs). Ctrl+C to stop.")
+
+        try:
+            while not stopping:
+                await _top_up_warm_tabs(context, warm_tabs)
+                await asyncio.sleep(2)
+        finally:
+            try:
+                os.remove(_state_path(profile))
+            except OSError:
+                pass
+            await context.close()
+            print("Browser service stopped and session saved.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep a warm, logged-in browser per profile for fast scrape attach.")
+    parser.add_argument("profile", choices=sorted(PROFILES))
+    parser.add_argument("--warm-tabs", type=int, default=2)
+    parser.add_argument("--port", type=int, default=None)
+    args = parser.parse_args()
+    serve(args.profile, warm_tabs=args.warm_tabs, port=args.port)
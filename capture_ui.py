@@ -1,18 +1,18 @@
 from playwright.sync_api import sync_playwright
 import time
 import os
+from browser_service import open_session
 
 USER_DATA_DIR = os.path.join(os.getcwd(), "wechat_user_data")
 WECHAT_URL = "https://channels.weixin.qq.com/platform/interaction/comment"
 
 def capture_ui():
     with sync_playwright() as p:
-        browser = p.chromium.launch_persistent_context(
+        browser, page, owns_browser = open_session(p, "wechat", lambda p: p.chromium.launch_persistent_context(
             USER_DATA_DIR, 
             headless=False, 
             viewport={'width': 1440, 'height': 900}
-        )
-        page = browser.pages[0]
+        ))
         page.goto(WECHAT_URL)
         print("Waiting for page load...")
         time.sleep(8)
@@ -42,7 +42,10 @@ def capture_ui():
         print("\n--- RIGHT SIDE OCR ---")
         print(right_text[:500])
         
-        browser.close()
+        if owns_browser:
+            browser.close()
+        else:
+            page.close()
 
 if __name__ == "__main__":
     capture_ui()
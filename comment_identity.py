@@ -0,0 +1,148 @@
+import hashlib
+import os
+import re
+import unicodedata
+from array import array
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_content(text):
+    """Canonical form of comment text for fingerprinting (width, case and spacing insensitive)."""
+    text = unicodedata.normalize("NFKC", text or "")
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+def _hash64(value):
+    key = int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little")
+    return key or 1  # 0 marks an empty slot in SeenSet
+
+def content_fingerprint(record):
+    """64-bit fingerprint of who said what, to whom and from where.
+
+    The relative time ("3分钟前") is deliberately left out since it drifts between
+    scrolls, and the full content is used so long comments sharing a prefix differ.
+    """
+    parts = [
+        record.get("user") or "",
+        record.get("reply_to") or "",
+        normalize_content(record.get("content")),
+        record.get("location") or "",
+    ]
+    return _hash64("fp\x1f" + "\x1f".join(parts))
+
+def _cidless_key(fingerprint):
+    return _hash64(f"nocid\x1f{fingerprint:x}")
+
+def comment_keys(record):
+    """Returns (lookup_keys, stored_keys) for a record.
+
+    A record with a native comment id is identified by that id: two comments
+    with the same user, text and location but different cids ("1", "+1" spam)
+    are distinct. Its fingerprint is stored too, so the same comment read later
+    without a cid is recognised. Records without a cid are identified by their
+    fingerprint, and also store a cid-less marker key that lets a later cid
+    record of the same comment (e.g. a resumed pre-cid scrape) match them.
+    """
+    fingerprint = content_fingerprint(record)
+    if record.get("cid"):
+        cid_key = _hash64(f"cid\x1f{record['cid']}")
+        return [cid_key, _cidless_key(fingerprint)], [cid_key, fingerprint]
+    return [fingerprint], [fingerprint, _cidless_key(fingerprint)]
+
+# First word of seen_keys.bin; bumped whenever comment_keys() changes
+_KEYS_MAGIC = int.from_bytes(b"SEENKEY2", "little")
+
+class SeenSet:
+    """Open-addressing hash set of 64-bit keys stored in a flat array.
+
+    Costs 16 bytes per key at the maximum load factor instead of a Python str
+    (plus set slot) per comment.
+    """
+
+    def __init__(self, capacity=1024):
+        size = 16
+        while size < capacity * 2:
+            size <<= 1
+        self._table = array('Q', bytes(8 * size))
+        self._mask = size - 1
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def _slot(self, key):
+        table = self._table
+        mask = self._mask
+        i = key & mask
+        while True:
+            current = table[i]
+            if current == 0 or current == key:
+                return i
+            i = (i + 1) & mask
+
+    def __contains__(self, key):
+        return self._table[self._slot(key)] == key
+
+    def add(self, key):
+        """Adds key; returns True if it was not already present."""
+        i = self._slot(key)
+        if self._table[i] == key:
+            return False
+        self._table[i] = key
+        self._count += 1
+        if self._count * 2 > len(self._table):
+            self._grow()
+        return True
+
+    def _grow(self):
+        old = self._table
+        self._table = array('Q', bytes(8 * len(old) * 2))
+        self._mask = len(self._table) - 1
+        for key in old:
+            if key:
+                self._table[self._slot(key)] = key
+
+    def seen(self, record):
+        lookup, _ = comment_keys(record)
+        return any(key in self for key in lookup)
+
+    def add_record(self, record):
+        """Marks a record as seen. Returns True if it was not known yet (see comment_keys)."""
+        lookup, stored = comment_keys(record)
+        new = not any(key in self for key in lookup)
+        for key in stored:
+            self.add(key)
+        return new
+
+    def save(self, path, tag):
+        """Writes the keys to path, tagged with the record count they were built from."""
+        keys = array('Q', [_KEYS_MAGIC, tag])
+        keys.extend(k for k in self._table if k)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            keys.tofile(f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, tag):
+        """Loads keys written by save(); returns None if missing or built from a different tag."""
+        if not os.path.exists(path):
+            return None
+        keys = array('Q')
+        try:
+            with open(path, 'rb') as f:
+                keys.frombytes(f.read())
+        except Exception:
+            return None
+        if len(keys) < 2 or keys[0] != _KEYS_MAGIC or keys[1] != tag:
+            return None  # other record count, or written with older key rules
+        seen = cls(capacity=len(keys))
+        for key in keys[2:]:
+            seen.add(key)
+        return seen
+
+    @classmethod
+    def from_records(cls, records):
+        seen = cls(capacity=len(records))
+        for record in records:
+            seen.add_record(record)
+        return seen
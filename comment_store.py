@@ -0,0 +1,184 @@
+import json
+import os
+import time
+
+class CommentStore:
+    """Append-only comment storage for one scraped video.
+
+    New comments and record updates are appended to comments.jsonl as they
+    happen; compact() folds the log into the regular comments.json (the format
+    douyin-web and analyze_comments.py read) and starts a fresh log. load()
+    resumes by reading comments.json and replaying whatever log is left.
+
+    Log records:
+        {"op": "base", "count": N}                  comments.json size the log builds on
+        {"op": "add", "comment": {...}}             a new top-level comment
+        {"op": "update", "index": i, "fields": {...}}
+    """
+
+    def __init__(self, target_dir, fsync_interval=5.0):
+        self.json_path = os.path.join(target_dir, "comments.json")
+        self.log_path = os.path.join(target_dir, "comments.jsonl")
+        self.fsync_interval = fsync_interval
+        self.comments = []
+        self._json_count = 0
+        self._log = None
+        self._last_fsync = time.time()
+
+    def load(self):
+        """Loads comments.json and replays the pending log on top of it."""
+        self.comments = []
+        if os.path.exists(self.json_path):
+            try:
+                with open(self.json_path, 'r', encoding='utf-8') as f:
+                    self.comments = json.load(f)
+            except Exception as e:
+                print(f"Could not read {self.json_path}: {e}")
+        self._json_count = len(self.comments)
+
+        replayed = self._replay_log()
+        if replayed:
+            print(f"Replayed {replayed} log records from {self.log_path}")
+        return self.comments
+
+    def _replay_log(self):
+        if not os.path.exists(self.log_path):
+            return 0
+        replayed = 0
+        with open(self.log_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn final line from a crash mid-write
+                    break
+                op = record.get("op")
+                if op == "base":
+                    if record.get("count") != len(self.comments):
+                        # comments.json was compacted after this log was written
+                        f.close()
+                        os.remove(self.log_path)
+                        return 0
+                elif op == "add":
+                    self.comments.append(record["comment"])
+                    replayed += 1
+                elif op == "update":
+                    index = record["index"]
+                    if 0 <= index < len(self.comments):
+                        self.comments[index].update(record["fields"])
+                    replayed += 1
+        return replayed
+
+    def _write(self, record):
+        if self._log is None:
+            fresh = not os.path.exists(self.log_path) or os.path.getsize(self.log_path) == 0
+            self._log = open(self.log_path, 'a', encoding='utf-8')
+            if fresh:
+                self._log.write(json.dumps({"op": "base", "count": self._json_count}) + "\n")
+        self._log.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._log.flush()
+        if time.time() - self._last_fsync >= self.fsync_interval:
+            self.sync()
+
+    def append(self, comment):
+        """Adds a new top-level comment and returns its index."""
+        self.comments.append(comment)
+        self._write({"op": "add", "comment": comment})
+        return len(self.comments) - 1
+
+    def update(self, index, **fields):
+        """Sets fields on an existing comment (e.g. replies, replies_scraped)."""
+        self.comments[index].update(fields)
+        self._write({"op": "update", "index": index, "fields": fields})
+
+    def append_many(self, comments):
+        """Adds several new top-level comments in one write; returns the index of the first."""
+        first = len(self.comments)
+        for comment in comments:
+            self.append(comment)
+        return first
+
+    def update_many(self, updates):
+        """Applies (index, fields) pairs in order, e.g. everything one scroll changed."""
+        for index, fields in updates:
+            self.update(index, **fields)
+
+    def sync(self):
+        if self._log:
+            self._log.flush()
+            os.fsync(self._log.fileno())
+        self._last_fsync = time.time()
+
+    def compact(self):
+        """Rewrites comments.json from memory and truncates the log."""
+        tmp_path = self.json_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.comments, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.json_path)
+        self._json_count = len(self.comments)
+        self.close()
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+
+    def close(self):
+        if self._log:
+            self.sync()
+            self._log.close()
+            self._log = None
+
+class ScrapeCheckpoint:
+    """Where an interrupted scrape of one video was, so a restart can seek there.
+
+    checkpoint.json holds a handful of scalars (phase, scroll offset, last-seen
+    comment fingerprint, Phase 2 queue position, failed thread indexes) and is
+    rewritten atomically at most every `interval` seconds. It is only trusted
+    while the comment store has at least as many comments as it recorded.
+    """
+
+    def __init__(self, target_dir, interval=5.0):
+        self.path = os.path.join(target_dir, "checkpoint.json")
+        self.interval = interval
+        self.state = {"phase": "collect", "scroll_top": 0, "last_fingerprint": None,
+                      "phase2_position": 0, "failed": [], "comments": 0}
+        self._last_save = 0.0
+
+    def load(self, comment_count):
+        """Returns the saved state, or None if there is none or it is ahead of the store."""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except Exception as e:
+            print(f"Could not read {self.path}: {e}")
+            return None
+        if state.get("comments", 0) > comment_count:
+            print("Checkpoint is ahead of the saved comments; ignoring it.")
+            return None
+        self.state.update(state)
+        return self.state
+
+    def update(self, **fields):
+        self.state.update(fields)
+
+    def due(self):
+        return time.time() - self._last_save >= self.interval
+
+    def save(self, force=False):
+        if not force and not self.due():
+            return
+        self.state["updated"] = time.time()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.path)
+        self._last_save = time.time()
+
+    def clear(self):
+        """Removes the checkpoint once the scrape finished."""
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
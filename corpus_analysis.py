@@ -0,0 +1,139 @@
+import argparse
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from analyze_comments import CommentAnalysis, iter_threads, load_matcher
+
+# Keyword analysis across every video in scraped_data/. Videos come from
+# manifest.json; each one is streamed through analyze_comments' CommentAnalysis
+# in a process pool (one process per core by default) and the per-video results
+# are merged into one corpus report plus a JSON file for other tools.
+#
+#   python corpus_analysis.py                          # all videos, report + scraped_data/corpus_analysis.json
+#   python corpus_analysis.py --keywords keywords.tsv -j 8 -o corpus.json
+
+_matcher = None
+
+def _init_worker(matcher):
+    # The automaton is built once in the parent and shipped to each worker at startup
+    global _matcher
+    _matcher = matcher
+
+def _analyze_video(video_dir):
+    started = time.time()
+    analysis = CommentAnalysis(_matcher)
+    for index, comment, replies in iter_threads(video_dir):
+        analysis.add_thread(index, comment, replies)
+    result = analysis.to_dict()
+    result["seconds"] = round(time.time() - started, 2)
+    return result
+
+def _video_summary(entry, result):
+    comments = result["comments"]
+    return {
+        "id": entry["id"],
+        "title": entry.get("title"),
+        "scrape_date": entry.get("scrape_date"),
+        "threads": result["threads"],
+        "comments": comments,
+        "negative": result["negative"],
+        "negative_ratio": round(result["negative"] / comments, 4) if comments else 0,
+        "top_keywords": dict(Counter(result["keyword_counts"]).most_common(10)),
+        "top_locations": dict(Counter(result["locations"]).most_common(10)),
+        "top_threads": result["top_threads"][:3],
+        "seconds": result["seconds"],
+    }
+
+def analyze_corpus(base_dir, keywords_path=None, workers=None, output=None, video_ids=None):
+    """Analyzes every video listed in base_dir/manifest.json; returns the JSON report (also written to output)."""
+    manifest_path = os.path.join(base_dir, "manifest.json")
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    if video_ids:
+        entries = [e for e in entries if e["id"] in video_ids]
+    matcher = load_matcher(keywords_path)
+
+    corpus = CommentAnalysis(matcher)
+    videos = []
+    failed = []
+    keyword_videos = Counter()   # in how many videos each keyword appears
+    location_videos = Counter()  # in how many videos each location comments
+    started = time.time()
+    print(f"Analyzing {len(entries)} videos against {len(matcher)} keywords with {workers or os.cpu_count()} processes...")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(matcher,)) as pool:
+        submitted = {pool.submit(_analyze_video, os.path.join(base_dir, entry["id"])): entry for entry in entries}
+        for future in as_completed(submitted):
+            entry = submitted[future]
+            try:
+                result = future.result()
+            except FileNotFoundError:
+                print(f"  SKIP {entry['id']}: no comments.json")
+                failed.append({"id": entry["id"], "error": "no comments.json"})
+                continue
+            except Exception as e:
+                print(f"  FAIL {entry['id']}: {e}")
+                failed.append({"id": entry["id"], "error": str(e)})
+                continue
+            corpus.merge(result)
+            keyword_videos.update(result["keyword_counts"].keys())
+            location_videos.update(result["locations"].keys())
+            videos.append(_video_summary(entry, result))
+            print(f"  [{len(videos) + len(failed)}/{len(entries)}] {entry['id']}: "
+                  f"{result['comments']} comments, {result['negative']} negative")
+
+    videos.sort(key=lambda v: v["negative"], reverse=True)
+    report = {
+        "generated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "keywords": len(matcher),
+        "categories": matcher.categories,
+        "duration": round(time.time() - started, 2),
+        "videos": videos,
+        "failed": failed,
+        "keyword_videos": dict(keyword_videos.most_common()),
+        "location_videos": dict(location_videos.most_common()),
+        "combined": corpus.to_dict(top=200),
+    }
+    print_corpus_report(corpus, report)
+
+    output = output or os.path.join(base_dir, "corpus_analysis.json")
+    tmp_path = output + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, output)
+    print(f"\nWrote {output}")
+    return report
+
+def print_corpus_report(corpus, report):
+    corpus.print_report()
+
+    videos = report["videos"]
+    print("\n" + "="*80)
+    print(f"VIDEOS ({len(videos)} analyzed, {len(report['failed'])} skipped, {report['duration']:.1f}s)")
+    print("="*80)
+    for v in videos[:20]:
+        title = (v["title"] or "")[:24]
+        print(f"{v['id']:<22} {v['negative']:>6}/{v['comments']:<7} ({v['negative_ratio']*100:5.1f}%)  {title}")
+
+    if report["keyword_videos"]:
+        print("\nKEYWORDS BY NUMBER OF VIDEOS")
+        for kw, count in list(report["keyword_videos"].items())[:20]:
+            print(f"{kw:<10}: {count} videos, {corpus.keyword_counts[kw]} hits")
+    if report["location_videos"]:
+        print("\nLOCATIONS BY NUMBER OF VIDEOS (comments, negative)")
+        for loc, count in list(report["location_videos"].items())[:20]:
+            print(f"{loc:<10}: {count} videos, {corpus.locations[loc]}, {corpus.negative_by_location[loc]}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keyword analysis across all scraped videos.")
+    parser.add_argument("--base-dir", default=os.path.join(os.getcwd(), "scraped_data"))
+    parser.add_argument("--keywords", help="Keyword file: term[<TAB>category[<TAB>weight]] per line")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: one per core)")
+    parser.add_argument("-o", "--output", help="JSON report path (default: <base-dir>/corpus_analysis.json)")
+    parser.add_argument("--video", action="append", help="Only analyze this video id (repeatable)")
+    args = parser.parse_args()
+    analyze_corpus(args.base_dir, args.keywords, args.workers, args.output, args.video)
@@ -2,6 +2,7 @@ import os
 import time
 from playwright.sync_api import sync_playwright
 from dotenv import load_dotenv
+from browser_service import open_session
 
 load_dotenv()
 
@@ -9,16 +10,18 @@ def debug_replies(url, target_user=None, target_content=None):
     user_data_dir = os.path.join(os.getcwd(), "douyin_user_data")
     p = sync_playwright().start()
     
-    print(f"Launching browser with user data dir: {user_data_dir}")
-    context = p.chromium.launch_persistent_context(
-        user_data_dir=user_data_dir,
-        headless=False,  # Show browser for debugging
-        channel="chrome",
-        args=["--start-maximized"],
-        no_viewport=True
-    )
+    def launch(p):
+        print(f"Launching browser with user data dir: {user_data_dir}")
+        return p.chromium.launch_persistent_context(
+            user_data_dir=user_data_dir,
+            headless=False,  # Show browser for debugging
+            channel="chrome",
+            args=["--start-maximized"],
+            no_viewport=True
+        )
     
-    page = context.pages[0] if context.pages else context.new_page()
+    # Reuses the warm douyin browser service when it is running
+    context, page, owns_context = open_session(p, "douyin", launch)
     
     print(f"Navigating to {url}...")
     page.goto(url, timeout=60000)
@@ -193,7 +196,10 @@ def debug_replies(url, target_user=None, target_content=None):
 
     print("Finished debugging. Keeping browser open for 10 seconds...")
     time.sleep(10)
-    context.close()
+    if owns_context:
+        context.close()
+    else:
+        page.close()
     p.stop()
 
 if __name__ == "__main__":
@@ -0,0 +1,214 @@
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from urllib.parse import urlparse, parse_qs
+
+# Web endpoints the comment panel pulls its data from while scrolling
+COMMENT_LIST_PATH = "/aweme/v1/web/comment/list/"
+REPLY_LIST_PATH = "/aweme/v1/web/comment/list/reply/"
+
+def classify_url(url):
+    """Returns 'comments', 'replies' or None for a response URL."""
+    path = urlparse(url).path
+    if path.startswith(REPLY_LIST_PATH):
+        return "replies"
+    if path.rstrip('/') + '/' == COMMENT_LIST_PATH:
+        return "comments"
+    return None
+
+def _first_image_url(c):
+    """Picks the best available URL from an API comment's image_list."""
+    for image in c.get("image_list") or []:
+        for key in ("origin_url", "medium_url", "thumb_url"):
+            urls = (image.get(key) or {}).get("url_list") or []
+            for u in urls:
+                if u and u.startswith("http"):
+                    return u
+    return None
+
+def parse_comment(c, image_fetcher=None):
+    """Converts one API comment object into the record shape used by comments.json.
+
+    image_fetcher, if given, is called with the image URL and should return the
+    relative image path (or None), the same way the DOM extractor stores images.
+    """
+    text = c.get("text")
+    if text is None:
+        return None
+
+    user = (c.get("user") or {}).get("nickname") or "Unknown"
+    if c.get("label_text") == "作者":
+        user = user + " [Author]"
+    reply_to = c.get("reply_to_username") or None
+
+    create_time = c.get("create_time") or 0
+    msg_time = datetime.fromtimestamp(create_time).strftime("%Y-%m-%d %H:%M") if create_time else ""
+
+    image_path = None
+    src = _first_image_url(c)
+    if src and image_fetcher:
+        image_path = image_fetcher(src)
+
+    reply_count = c.get("reply_comment_total") or 0
+    return {
+        "user": user,
+        "reply_to": reply_to,
+        "content": text.strip(),
+        "time": msg_time,
+        "location": c.get("ip_label") or "",
+        "image_path": image_path,
+        "scrape_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "replies_scraped": reply_count == 0,
+        "replies": [],
+        "cid": str(c.get("cid") or ""),
+        "digg_count": c.get("digg_count") or 0,
+        "create_time": create_time,
+        "reply_count": reply_count
+    }
+
+class CommentResponseCollector:
+    """Builds comment threads from the comment/reply list API responses.
+
+    Responses are buffered by the page event handler and parsed on the scraper's
+    own schedule via process_pending(), so no Playwright calls are made from
+    inside the event callback. ingest() is pure and can be fed recorded payloads.
+    """
+
+    def __init__(self, image_fetcher=None, record_dir=None, on_replies=None):
+        self.image_fetcher = image_fetcher
+        self.record_dir = record_dir
+        # Called with a known thread's record after reply responses changed it,
+        # so the scraper can log the change (CommentStore.update)
+        self.on_replies = on_replies
+        self.threads = {}  # cid -> top-level record
+        self.exhausted = False  # comment list reported has_more == 0
+        self.responses_seen = 0
+        self.known_streak = 0  # consecutive already-known threads in list order
+        self.reply_count_changes = []  # (cid, new reply_count) for known threads
+        self._pending = []
+        self._reply_cids = {}  # parent cid -> set of reply cids
+
+    def attach(self, page):
+        page.on("response", self._on_response)
+
+    def register(self, record):
+        """Adds an already-known thread (e.g. from a resumed comments.json)."""
+        cid = record.get("cid")
+        if cid:
+            self.threads[cid] = record
+            self._reply_cids[cid] = {r.get("cid") for r in record.get("replies", []) if r.get("cid")}
+
+    def _on_response(self, response):
+        if classify_url(response.url):
+            self._pending.append(response)
+
+    async def process_pending(self):
+        """Parses buffered responses and returns newly seen top-level records."""
+        fresh = []
+        pending, self._pending = self._pending, []
+        for response in pending:
+            try:
+                if response.status != 200:
+                    continue
+                payload = await response.json()
+            except Exception as e:
+                print(f"  [DEBUG] Could not read API response: {e}")
+                continue
+            fresh.extend(self.ingest(response.url, payload))
+        return fresh
+
+    def ingest(self, url, payload):
+        """Merges one decoded API payload. Returns newly seen top-level records."""
+        kind = classify_url(url)
+        if not kind or not isinstance(payload, dict):
+            return []
+        self.responses_seen += 1
+        if self.record_dir:
+            self._record(url, payload)
+
+        if kind == "comments":
+            if not payload.get("has_more", 1):
+                self.exhausted = True
+            fresh = []
+            for c in payload.get("comments") or []:
+                record = self._add_thread(c)
+                if record:
+                    fresh.append(record)
+            return fresh
+
+        parent_cid = (parse_qs(urlparse(url).query).get("comment_id") or [""])[0]
+        parent = self.threads.get(parent_cid)
+        if parent is None:
+            return []
+        added = self._add_replies(parent_cid, payload.get("comments") or [])
+        done = not payload.get("has_more", 0)
+        if done:
+            parent["replies_scraped"] = True
+        if self.on_replies and (added or done):
+            self.on_replies(parent)
+        return []
+
+    def _add_thread(self, c):
+        cid = str(c.get("cid") or "")
+        if not cid:
+            return None
+        if cid in self.threads:
+            self.known_streak += 1
+            known = self.threads[cid]
+            new_count = c.get("reply_comment_total") or 0
+            if new_count != known.get("reply_count", len(known.get("replies", []))):
+                self.reply_count_changes.append((cid, new_count))
+            return None
+        record = parse_comment(c, self.image_fetcher)
+        if not record:
+            return None
+        self.threads[cid] = record
+        self.known_streak = 0
+        self._reply_cids[cid] = set()
+        # The list response inlines the first few replies of each thread
+        preview = c.get("reply_comment") or []
+        self._add_replies(cid, preview)
+        if record["reply_count"] and len(record["replies"]) >= record["reply_count"]:
+            record["replies_scraped"] = True
+        return record
+
+    def _add_replies(self, parent_cid, items):
+        parent = self.threads[parent_cid]
+        known = self._reply_cids.setdefault(parent_cid, set())
+        added = 0
+        for c in items:
+            cid = str(c.get("cid") or "")
+            if not cid or cid in known:
+                continue
+            reply = parse_comment(c, self.image_fetcher)
+            if reply:
+                reply["replies_scraped"] = True
+                known.add(cid)
+                parent["replies"].append(reply)
+                added += 1
+        return added
+
+    def _record(self, url, payload):
+        os.makedirs(self.record_dir, exist_ok=True)
+        name = f"{int(time.time() * 1000)}_{self.responses_seen:05d}.json"
+        with open(os.path.join(self.record_dir, name), 'w', encoding='utf-8') as f:
+            json.dump({"url": url, "body": payload}, f, ensure_ascii=False)
+
+def replay_fixtures(paths, image_fetcher=None):
+    """Feeds recorded {"url", "body"} response files through a collector, in order."""
+    collector = CommentResponseCollector(image_fetcher=image_fetcher)
+    for path in sorted(paths):
+        with open(path, 'r', encoding='utf-8') as f:
+            fixture = json.load(f)
+        collector.ingest(fixture["url"], fixture["body"])
+    return collector
+
+if __name__ == "__main__":
+    # Usage: python douyin_api.py recorded/*.json
+    collector = replay_fixtures(sys.argv[1:])
+    threads = list(collector.threads.values())
+    reply_total = sum(len(t["replies"]) for t in threads)
+    print(f"Replayed {collector.responses_seen} responses: {len(threads)} threads, {reply_total} replies.")
+    print(f"Comment list exhausted: {collector.exhausted}")
@@ -0,0 +1,355 @@
+import argparse
+import json
+import random
+import struct
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# Deterministic offline stand-in for a Douyin video page. It mimics what the
+# scraper depends on: the comment panel markup (same obfuscated class names),
+# a virtualized [data-e2e="comment-item"] list inside .comment-mainContent,
+# lazy pages with a "加载中" indicator, "展开N条回复"/"展开更多" buttons, reply
+# containers, comment images, an optional captcha overlay, and the comment /
+# reply list API endpoints the page itself fetches from. /s/<id> stands in for
+# a v.douyin.com short link: it 302-redirects to /share/video/<id>/, which then
+# redirects to the canonical /video/<id> page.
+
+LOCATIONS = ["广东", "北京", "上海", "浙江", "四川", "江苏", "湖北", "山东", "河南", "福建", "湖南", "陕西"]
+WORDS = [
+    "哈哈哈", "说得好", "太真实了", "支持", "我觉得", "不一定", "确实如此", "学到了",
+    "有道理", "笑死", "同意", "这个视频", "评论区", "真的假的", "厉害", "加油",
+    "第一次见", "感觉", "还是", "不错", "离谱", "关注了", "路过", "顶一下"
+]
+BASE_TIME = 1700000000
+NOW = BASE_TIME + 3600
+
+class FixtureConfig:
+    """Scenario knobs for the stand-in page. All sizes and delays are deterministic per seed."""
+
+    def __init__(self, comments=1000, reply_ratio=0.2, max_replies=30, page_size=20,
+                 reply_page_size=10, latency_ms=150, image_ratio=0.05, users=5000,
+                 captcha_after=0, captcha_seconds=5, virtual_window=3, seed=1):
+        self.comments = comments
+        self.reply_ratio = reply_ratio
+        self.max_replies = max_replies
+        self.page_size = page_size
+        self.reply_page_size = reply_page_size
+        self.latency_ms = latency_ms
+        self.image_ratio = image_ratio
+        self.users = users
+        self.captcha_after = captcha_after  # show the overlay after this many comment pages (0 = never)
+        self.captcha_seconds = captcha_seconds  # the overlay dismisses itself after this long
+        self.virtual_window = virtual_window  # viewports of items kept in the DOM above/below
+        self.seed = seed
+        self.base_url = ""  # set by start_fixture_server; image URLs must be absolute
+
+    def reply_total(self, index):
+        r = random.Random(self.seed * 1000003 + index)
+        if r.random() < self.reply_ratio:
+            return r.randint(1, self.max_replies)
+        return 0
+
+    def expected_totals(self):
+        """(top-level comments, replies) the page will serve."""
+        return self.comments, sum(self.reply_total(i) for i in range(self.comments))
+
+def _text(r, index):
+    if r.random() < 0.02:
+        return "1"
+    return "".join(r.choice(WORDS) for _ in range(r.randint(1, 6))) + f" {index}"
+
+def make_comment(config, index):
+    """API-shaped top-level comment number `index`."""
+    r = random.Random(config.seed * 2000003 + index)
+    c = {
+        "cid": str(7000000000000000000 + index),
+        "text": _text(r, index),
+        "create_time": BASE_TIME - index * 7,
+        "digg_count": r.randint(0, 5000),
+        "user": {"nickname": f"用户{r.randint(1, config.users)}"},
+        "ip_label": r.choice(LOCATIONS),
+        "reply_comment_total": config.reply_total(index),
+        "reply_id": "0",
+        "image_list": None,
+    }
+    if index % 500 == 7:
+        c["label_text"] = "作者"
+    if r.random() < config.image_ratio:
+        c["image_list"] = [{"origin_url": {"url_list": [f"{config.base_url}/img/c{index}.bmp"]}}]
+    return c
+
+def make_reply(config, index, j):
+    r = random.Random((config.seed * 1000003 + index) * 10007 + j)
+    parent_cid = 7000000000000000000 + index
+    c = {
+        "cid": str(8000000000000000000 + index * 1000 + j),
+        "text": _text(r, f"{index}-{j}"),
+        "create_time": BASE_TIME - index * 7 + j + 1,
+        "digg_count": r.randint(0, 300),
+        "user": {"nickname": f"用户{r.randint(1, config.users)}"},
+        "ip_label": r.choice(LOCATIONS),
+        "reply_comment_total": 0,
+        "reply_id": str(parent_cid),
+        "image_list": None,
+    }
+    if j > 0 and r.random() < 0.3:
+        c["reply_to_username"] = f"用户{r.randint(1, config.users)}"
+    return c
+
+def _bmp(width, height, seed):
+    """Tiny solid-colour 24-bit BMP (browsers decode it; naturalWidth is real)."""
+    r = random.Random(seed)
+    pixel = bytes([r.randint(0, 255), r.randint(0, 255), r.randint(0, 255)])
+    row = pixel * width + b"\x00" * ((4 - (width * 3) % 4) % 4)
+    data = row * height
+    header = b"BM" + struct.pack("<IHHI", 54 + len(data), 0, 0, 54)
+    dib = struct.pack("<IiiHHIIiiII", 40, width, height, 1, 24, 0, len(data), 2835, 2835, 0, 0)
+    return header + dib + data
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>__TITLE__ - 抖音</title>
+<style>
+  body { margin: 0; font-family: sans-serif; display: flex; height: 100vh; }
+  .player { flex: 1; background: #111; }
+  .sidebar { width: 420px; display: flex; flex-direction: column; }
+  .comment-mainContent { flex: 1; overflow-y: auto; }
+  .comment-item { padding: 10px 12px; border-bottom: 1px solid #eee; }
+  .comment-item .avatar { width: 24px; height: 24px; }
+  .comment-item .pic { width: 64px; height: 64px; display: block; }
+  .replyContainer { margin-left: 24px; }
+  .loading-indicator { padding: 12px; text-align: center; color: #999; }
+  .captcha-container { position: fixed; inset: 30% 30%; background: #fff; border: 2px solid #f33; z-index: 10; }
+</style></head>
+<body>
+  <nav><a href="//www.douyin.com/user/self">我</a></nav>
+  <div class="player"></div>
+  <div class="sidebar">
+    <div data-e2e="comment-switch-tab" class="comment-tab-text">评论(__TOTAL__)</div>
+    <div class="comment-mainContent" scrollable="true"><div class="comment-list"></div></div>
+  </div>
+<script>
+const CFG = __CONFIG__;
+const AWEME_ID = "__AWEME_ID__";
+const container = document.querySelector('.comment-mainContent');
+const list = document.querySelector('.comment-list');
+const model = [];
+let cursor = 0, hasMore = true, loading = false, pagesLoaded = 0, captchaUp = false;
+
+const esc = (s) => String(s).replace(/[&<>"]/g, (ch) => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'})[ch]);
+const ago = (t) => Math.max(1, Math.floor((CFG.now - t) / 60)) + '分钟前';
+
+function itemHtml(c, isReply) {
+  const author = c.label_text === '作者' ? '<div>作者</div>' : '';
+  const name = c.reply_to_username
+    ? `<a>${esc(c.user.nickname)}</a> ▸ <a>${esc(c.reply_to_username)}</a>`
+    : `<a>${esc(c.user.nickname)}</a>${author}`;
+  const pic = c.image_list ? `<img class="pic" src="${c.image_list[0].origin_url.url_list[0]}">` : '';
+  return `<img class="avatar" src="/img/avatar.bmp">
+    <div class="_uYOTNYZ">${name}</div>
+    <div class="C7LroK_h">${esc(c.text)}</div>${pic}
+    <div class="fJhvAqos">${ago(c.create_time)} · ${esc(c.ip_label)}</div>`;
+}
+
+function renderReplies(c) {
+  const box = c.el.querySelector('.replyContainer');
+  while (box.children.length < c.replies.length) {
+    const r = c.replies[box.children.length];
+    const el = document.createElement('div');
+    el.className = 'comment-item';
+    el.setAttribute('data-e2e', 'comment-item');
+    el.innerHTML = itemHtml(r, true);
+    box.appendChild(el);
+  }
+  const btn = c.el.querySelector('.expand-btn');
+  const total = c.reply_comment_total;
+  if (!total || c.replies.length >= total) { btn.style.display = 'none'; return; }
+  btn.style.display = '';
+  btn.textContent = c.replies.length ? '展开更多' : `展开${total}条回复`;
+}
+
+function render(c) {
+  const el = document.createElement('div');
+  el.className = 'comment-item';
+  el.setAttribute('data-e2e', 'comment-item');
+  el.innerHTML = itemHtml(c, false) + '<div class="replyContainer"></div><button class="expand-btn"></button>';
+  c.el = el;
+  el.querySelector('.expand-btn').addEventListener('click', () => loadReplies(c));
+  renderReplies(c);
+  return el;
+}
+
+async function loadReplies(c) {
+  if (c.busy) return;
+  c.busy = true;
+  const url = `/aweme/v1/web/comment/list/reply/?item_id=${AWEME_ID}&comment_id=${c.cid}&cursor=${c.replies.length}&count=${CFG.reply_page_size}`;
+  const data = await (await fetch(url)).json();
+  c.replies.push(...data.comments);
+  c.busy = false;
+  if (c.el && c.el.isConnected) renderReplies(c);
+}
+
+async function loadPage() {
+  if (loading || !hasMore || captchaUp) return;
+  loading = true;
+  const ind = document.createElement('div');
+  ind.className = 'loading-indicator';
+  ind.textContent = '加载中';
+  list.appendChild(ind);
+  const data = await (await fetch(`/aweme/v1/web/comment/list/?aweme_id=${AWEME_ID}&cursor=${cursor}&count=${CFG.page_size}`)).json();
+  ind.remove();
+  for (const c of data.comments) {
+    c.replies = [];
+    model.push(c);
+    list.appendChild(render(c));
+  }
+  cursor = data.cursor;
+  hasMore = !!data.has_more;
+  loading = false;
+  pagesLoaded++;
+  if (CFG.captcha_after && pagesLoaded === CFG.captcha_after) showCaptcha();
+}
+
+function showCaptcha() {
+  captchaUp = true;
+  const overlay = document.createElement('div');
+  overlay.className = 'captcha-container';
+  overlay.textContent = '请完成安全验证';
+  document.body.appendChild(overlay);
+  setTimeout(() => { overlay.remove(); captchaUp = false; }, CFG.captcha_seconds * 1000);
+}
+
+// Virtualization: items far outside the viewport are swapped for spacers
+function virtualize() {
+  const view = container.getBoundingClientRect();
+  const margin = view.height * CFG.virtual_window;
+  for (const c of model) {
+    const node = c.el && c.el.isConnected ? c.el : c.spacer;
+    if (!node || !node.isConnected) continue;
+    const rect = node.getBoundingClientRect();
+    const near = rect.bottom > view.top - margin && rect.top < view.bottom + margin;
+    if (node === c.el && !near) {
+      const spacer = document.createElement('div');
+      spacer.style.height = rect.height + 'px';
+      c.spacer = spacer;
+      c.el.replaceWith(spacer);
+    } else if (node === c.spacer && near) {
+      c.spacer.replaceWith(render(c));
+      c.spacer = null;
+    }
+  }
+}
+
+let scheduled = false;
+container.addEventListener('scroll', () => {
+  if (scheduled) return;
+  scheduled = true;
+  setTimeout(() => {
+    scheduled = false;
+    virtualize();
+    if (container.scrollTop + container.clientHeight > container.scrollHeight - 400) loadPage();
+  }, 30);
+});
+loadPage();
+</script>
+</body></html>
+"""
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    server_version = "DouyinFixture/1.0"
+
+    def log_message(self, format, *args):
+        pass  # keep benchmark output clean
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _redirect(self, location):
+        self.send_response(302)
+        self.send_header("Location", location)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _json(self, payload):
+        time.sleep(self.server.config.latency_ms / 1000.0)
+        self._send(200, json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8")
+
+    def do_GET(self):
+        config = self.server.config
+        parsed = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        path = parsed.path
+
+        if path.startswith("/video/"):
+            aweme_id = path.rstrip("/").split("/")[-1]
+            page_cfg = {
+                "page_size": config.page_size, "reply_page_size": config.reply_page_size,
+                "captcha_after": config.captcha_after, "captcha_seconds": config.captcha_seconds,
+                "virtual_window": config.virtual_window, "now": NOW,
+            }
+            html = (PAGE_TEMPLATE
+                    .replace("__TITLE__", f"{aweme_id} 测试视频")
+                    .replace("__TOTAL__", str(config.comments))
+                    .replace("__AWEME_ID__", aweme_id)
+                    .replace("__CONFIG__", json.dumps(page_cfg)))
+            self._send(200, html.encode("utf-8"), "text/html; charset=utf-8")
+        elif path == "/aweme/v1/web/comment/list/":
+            start = int(query.get("cursor", 0))
+            count = int(query.get("count", config.page_size))
+            end = min(start + count, config.comments)
+            comments = [make_comment(config, i) for i in range(start, end)]
+            self._json({"status_code": 0, "comments": comments, "cursor": end,
+                        "has_more": 1 if end < config.comments else 0, "total": config.comments})
+        elif path == "/aweme/v1/web/comment/list/reply/":
+            index = int(query.get("comment_id", "0")) - 7000000000000000000
+            total = config.reply_total(index) if 0 <= index < config.comments else 0
+            start = int(query.get("cursor", 0))
+            end = min(start + int(query.get("count", config.reply_page_size)), total)
+            replies = [make_reply(config, index, j) for j in range(start, end)]
+            self._json({"status_code": 0, "comments": replies, "cursor": end,
+                        "has_more": 1 if end < total else 0, "total": total})
+        elif path.startswith("/s/"):
+            self._redirect(f"/share/video/{path.rstrip('/').split('/')[-1]}/?from=short_link")
+        elif path.startswith("/share/video/"):
+            self._redirect(f"/video/{path.rstrip('/').split('/')[-1]}")
+        elif path.startswith("/img/"):
+            name = path.rsplit("/", 1)[-1]
+            size = 24 if name.startswith("avatar") else 64
+            self._send(200, _bmp(size, size, name), "image/bmp")
+        elif path == "/":
+            self._send(200, b'<a href="//www.douyin.com/user/self">me</a>', "text/html")
+        else:
+            self._send(404, b"not found", "text/plain")
+
+def start_fixture_server(config=None, host="127.0.0.1", port=0):
+    """Starts the stand-in server on a background thread. Returns (server, base_url)."""
+    server = ThreadingHTTPServer((host, port), FixtureHandler)
+    server.daemon_threads = True
+    server.config = config or FixtureConfig()
+    server.config.base_url = f"http://{host}:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, server.config.base_url
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a deterministic offline Douyin comment page.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--comments", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=int, default=150)
+    parser.add_argument("--captcha-after", type=int, default=0)
+    args = parser.parse_args()
+
+    cfg = FixtureConfig(comments=args.comments, latency_ms=args.latency_ms, captcha_after=args.captcha_after)
+    srv, base = start_fixture_server(cfg, port=args.port)
+    print(f"Serving {cfg.comments} comments at {base}/video/fixture (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        srv.shutdown()
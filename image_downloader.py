@@ -0,0 +1,127 @@
+import hashlib
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+def image_filename(src):
+    """Content-addressed file name used in every images/ directory."""
+    return f"{hashlib.md5(src.encode()).hexdigest()}.jpg"
+
+class ImageDownloader:
+    """Bounded background pool that fetches comment images over one keep-alive session.
+
+    submit() never blocks on I/O: it returns the relative image path right away and
+    the file appears once the download lands. Call wait() before publishing results.
+    """
+
+    def __init__(self, max_workers=8, per_host=4, retries=3, backoff=0.5, timeout=10):
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.per_host = per_host
+
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="img")
+        self._lock = threading.Lock()
+        self._host_slots = {}
+        self._inflight = {}  # local path -> future
+        self._futures_by_dir = {}
+
+        self.downloaded = 0
+        self.failed = 0
+        self.bytes = 0
+
+    def submit(self, src, image_dir):
+        """Queues src for download into image_dir and returns its path relative to the video dir."""
+        filename = image_filename(src)
+        local_path = os.path.join(image_dir, filename)
+        with self._lock:
+            if local_path not in self._inflight and not os.path.exists(local_path):
+                future = self._executor.submit(self._fetch, src, local_path)
+                self._inflight[local_path] = future
+                self._futures_by_dir.setdefault(image_dir, []).append(future)
+        return os.path.join("images", filename)
+
+    def wait(self, image_dir=None, timeout=None):
+        """Completion barrier for everything queued so far (optionally for one image_dir only)."""
+        with self._lock:
+            if image_dir is None:
+                futures = [f for fs in self._futures_by_dir.values() for f in fs]
+                self._futures_by_dir = {}
+            else:
+                futures = self._futures_by_dir.pop(image_dir, [])
+        if futures:
+            print(f"Waiting for {len(futures)} image downloads to finish...")
+            wait_futures(futures, timeout=timeout)
+
+    def close(self):
+        self.wait()
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+    def _host_slot(self, src):
+        host = urlparse(src).netloc
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_slots[host]
+
+    def _fetch(self, src, local_path):
+        try:
+            for attempt in range(self.retries + 1):
+                try:
+                    with self._host_slot(src):
+                        response = self.session.get(src, timeout=self.timeout)
+                    if response.status_code == 200:
+                        self._write_atomic(local_path, response.content)
+                        with self._lock:
+                            self.downloaded += 1
+                            self.bytes += len(response.content)
+                        return True
+                    # Only throttling and server errors are worth retrying
+                    if response.status_code != 429 and response.status_code < 500:
+                        break
+                except requests.RequestException:
+                    pass
+                if attempt < self.retries:
+                    time.sleep(self.backoff * (2 ** attempt) + random.uniform(0, self.backoff))
+            with self._lock:
+                self.failed += 1
+            return False
+        finally:
+            with self._lock:
+                self._inflight.pop(local_path, None)
+
+    @staticmethod
+    def _write_atomic(local_path, content):
+        tmp_path = f"{local_path}.{threading.get_ident()}.part"
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, local_path)
+
+_shared_downloader = None
+_shared_lock = threading.Lock()
+
+def get_image_downloader():
+    """Process-wide downloader so every scrape in this process shares one pool and session."""
+    global _shared_downloader
+    with _shared_lock:
+        if _shared_downloader is None:
+            _shared_downloader = ImageDownloader(
+                max_workers=int(os.getenv("IMAGE_WORKERS", "8")),
+                per_host=int(os.getenv("IMAGE_PER_HOST", "4"))
+            )
+        return _shared_downloader
@@ -0,0 +1,93 @@
+from collections import deque, namedtuple
+
+# Aho-Corasick multi-keyword matcher. The automaton is built once from the
+# keyword list; find_all() then walks each text a single time and reports
+# every occurrence of every keyword (overlapping ones included), so matching
+# cost depends on the text length, not on how many keywords there are.
+#
+# Keyword files are UTF-8, one term per line, optionally tab-separated with a
+# category and a weight; blank lines and lines starting with # are skipped:
+#
+#   赢麻了	sarcasm	2
+#   人矿	negative
+#   润
+
+KeywordHit = namedtuple("KeywordHit", ["term", "category", "weight", "start", "end"])
+
+class KeywordMatcher:
+    def __init__(self, entries, default_category="keyword"):
+        """entries: terms, or (term, category, weight) tuples (category and weight optional)."""
+        self._goto = [{}]  # state -> {char: next state}
+        self._fail = [0]
+        self._out = [[]]  # state -> [(term, category, weight)] ending here (incl. via fail links)
+        self.terms = {}
+        for entry in entries:
+            if isinstance(entry, str):
+                entry = (entry,)
+            term = entry[0].strip().lower()
+            if not term or term in self.terms:
+                continue
+            category = entry[1] if len(entry) > 1 and entry[1] else default_category
+            weight = float(entry[2]) if len(entry) > 2 and entry[2] not in (None, "") else 1.0
+            self.terms[term] = (category, weight)
+            self._insert(term, category, weight)
+        self._build_fail_links()
+
+    @classmethod
+    def from_file(cls, path, default_category="keyword"):
+        entries = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if not line.strip() or line.lstrip().startswith("#"):
+                    continue
+                entries.append(tuple(part.strip() for part in line.split("\t")))
+        return cls(entries, default_category)
+
+    def __len__(self):
+        return len(self.terms)
+
+    @property
+    def categories(self):
+        return sorted({category for category, _ in self.terms.values()})
+
+    def _insert(self, term, category, weight):
+        state = 0
+        for ch in term:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((term, category, weight))
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                # Inherit the matches of the longest proper suffix
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, text):
+        """Returns every keyword occurrence in text, in order of where it ends."""
+        hits = []
+        if not text:
+            return hits
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, ch in enumerate(text.lower()):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for term, category, weight in out[state]:
+                hits.append(KeywordHit(term, category, weight, i + 1 - len(term), i + 1))
+        return hits
@@ -0,0 +1,166 @@
+import asyncio
+import os
+import random
+import time
+
+# Arms a MutationObserver on `root` (an element, or the comment panel / body when
+# called on the page) and parks a promise on window that resolves as soon as new
+# comment items are added, the loading indicator goes away, the page stays idle
+# (no mutations at all) for opts.idle ms, or the timeout hits.
+# Arming happens *before* the scroll/click so no mutation can slip through.
+ARM_ACTIVITY_JS = """
+(root, opts) => {
+    if (!root) {
+        root = document.querySelector('.comment-mainContent') || document.body;
+    }
+    const itemSelector = '[data-e2e="comment-item"]';
+    const isLoading = () => !!root.querySelector('.loading-icon')
+        || /努力加载中|加载中/.test(root.textContent || '');
+    const startCount = root.querySelectorAll(itemSelector).length;
+    let wasLoading = isLoading();
+
+    window.__scrapeActivity = new Promise((resolve) => {
+        let checkQueued = false;
+        let idleTimer = null;
+        const done = (reason) => {
+            observer.disconnect();
+            clearTimeout(timer);
+            clearTimeout(idleTimer);
+            resolve({ reason: reason, before: startCount, after: root.querySelectorAll(itemSelector).length });
+        };
+        const resetIdle = () => {
+            clearTimeout(idleTimer);
+            idleTimer = setTimeout(() => done('idle'), opts.idle);
+        };
+        const observer = new MutationObserver((mutations) => {
+            resetIdle();
+            for (const m of mutations) {
+                for (const node of m.addedNodes) {
+                    if (node.nodeType === 1 && (node.matches(itemSelector) || node.querySelector(itemSelector))) {
+                        done('items');
+                        return;
+                    }
+                }
+            }
+            // Loading state is re-checked at most every 50ms (timers, not rAF,
+            // so background tabs in batch runs are not starved)
+            if (!checkQueued) {
+                checkQueued = true;
+                setTimeout(() => {
+                    checkQueued = false;
+                    const loading = isLoading();
+                    if (wasLoading && !loading) done('loaded');
+                    wasLoading = loading;
+                }, 50);
+            }
+        });
+        observer.observe(root, { childList: true, subtree: true, characterData: true });
+        const timer = setTimeout(() => done('timeout'), opts.timeout);
+        resetIdle();
+    });
+    return startCount;
+}
+"""
+
+AWAIT_ACTIVITY_JS = "() => window.__scrapeActivity || { reason: 'unarmed' }"
+
+class Pacing:
+    """Wait/pacing policy for the scrape loops.
+
+    Waits end as soon as the page reacts (see ARM_ACTIVITY_JS); the floor keeps a
+    minimum human-like gap between actions and jitter randomizes it a little.
+    Every value can be overridden with a PACING_<NAME> env var (seconds).
+    """
+
+    DEFAULTS = {
+        "scroll_floor": 0.4,
+        "scroll_timeout": 10.0,
+        "expand_floor": 0.8,
+        "expand_timeout": 8.0,
+        "idle_timeout": 1.5,
+        "settle_timeout": 5.0,
+        "jitter": 0.4,
+    }
+
+    def __init__(self, **overrides):
+        for name, value in self.DEFAULTS.items():
+            setattr(self, name, float(overrides.get(name, value)))
+
+    @classmethod
+    def from_env(cls):
+        overrides = {}
+        for name in cls.DEFAULTS:
+            env_value = os.getenv(f"PACING_{name.upper()}")
+            if env_value:
+                overrides[name] = env_value
+        return cls(**overrides)
+
+    def remaining(self, started, floor):
+        """Seconds left of floor (+ jitter) since `started`."""
+        return floor + random.uniform(0, self.jitter) - (time.time() - started)
+
+    async def pause(self, started, floor):
+        """Sleeps whatever is left of floor (+ jitter) since `started`."""
+        remaining = self.remaining(started, floor)
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+
+class ClickBudget:
+    """Global click-rate limit shared by every tab expanding replies for a scrape.
+
+    acquire() waits for the next click slot; slots are spaced 1/rate seconds
+    apart across all tabs. REPLY_CLICK_RATE sets the rate (clicks per second).
+    All tabs run on one event loop, and a slot is taken without awaiting, so
+    no lock is needed.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._next = 0.0
+
+    @classmethod
+    def from_env(cls, default=2.0):
+        """Returns a budget for REPLY_CLICK_RATE, or None when it is 0 (unlimited)."""
+        rate = float(os.getenv("REPLY_CLICK_RATE", default))
+        return cls(rate) if rate > 0 else None
+
+    async def acquire(self):
+        now = time.monotonic()
+        slot = max(now, self._next)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+# Waits for pages driven through playwright.async_api; the round-trips and the
+# pause are awaited, so other pages on the same event loop keep going meanwhile.
+
+async def arm_activity_wait(target, timeout, idle=1.5):
+    """Starts watching target (Page or ElementHandle) for new comment items / loading done."""
+    opts = {"timeout": int(timeout * 1000), "idle": int(idle * 1000)}
+    try:
+        if hasattr(target, "main_frame"):
+            # Page.evaluate passes opts as the first argument; there is no root element
+            await target.evaluate("(opts) => (" + ARM_ACTIVITY_JS + ")(null, opts)", opts)
+        else:
+            await target.evaluate(ARM_ACTIVITY_JS, opts)
+        return True
+    except Exception as e:
+        print(f"  [DEBUG] Could not arm activity wait: {e}")
+        return False
+
+async def await_activity(target):
+    """Waits until the armed watcher fires. Returns its result dict."""
+    try:
+        return await target.evaluate(AWAIT_ACTIVITY_JS)
+    except Exception as e:
+        print(f"  [DEBUG] Activity wait failed: {e}")
+        return {"reason": "error"}
+
+async def act_and_wait(target, action, timeout, floor, pacing):
+    """Arms a watcher on target, awaits action(), waits for the page to react, then applies pacing."""
+    started = time.time()
+    armed = await arm_activity_wait(target, timeout, pacing.idle_timeout)
+    await action()
+    result = await await_activity(target) if armed else {"reason": "unarmed"}
+    await pacing.pause(started, floor)
+    return result
@@ -0,0 +1,98 @@
+import asyncio
+import math
+import time
+
+from page_waits import Pacing
+from resource_blocking import ResourceBlocker
+
+# Phase 2 fan-out: the threads still waiting for replies are split across K
+# extra tabs of the same video. Every tab is a page of the scrape's own browser
+# context driven by its own task on the event loop, and all of them draw clicks
+# from one shared ClickBudget.
+
+async def _harvest_worker(worker_id, context, url, assigned, results, image_dir, budget, resource_profile):
+    # Imported here: scrape_douyin imports this module
+    from scrape_douyin import (
+        ScrollContainer, VerificationWatcher, check_for_verification_async, expand_replies,
+        extract_thread_replies, locate_thread, open_comment_panel, seek_scroll_offset,
+    )
+    page = None
+    done = 0
+    try:
+        page = await context.new_page()
+        await ResourceBlocker(resource_profile).install(page)
+        pacing = Pacing.from_env()
+        verification = VerificationWatcher()
+        await verification.install(page)
+        await page.goto(url, timeout=60000)
+        await open_comment_panel(page, pacing)
+        container = ScrollContainer(page)
+        await container.resolve()
+
+        # A fresh tab has only the first lazy page loaded, so jumps to deeper
+        # offsets would be clamped: load the list down to this run first
+        if assigned and assigned[0][2] is not None:
+            await seek_scroll_offset(container, assigned[0][2], pacing)
+
+        for fingerprint, reply_count, offset in assigned:
+            await check_for_verification_async(page, verification)
+            if offset is not None:
+                # Runs can span several lazy pages; returns at once when already loaded
+                await seek_scroll_offset(container, offset, pacing)
+            replies = None
+            target_el = await locate_thread(page, container, fingerprint, offset, pacing)
+            if target_el:
+                await expand_replies(target_el, pacing, reply_count, budget)
+                replies = await extract_thread_replies(target_el, image_dir)
+            await results.put((fingerprint, replies))
+            done += 1
+    except Exception as e:
+        print(f"[reply tab {worker_id}] Stopped after {done}/{len(assigned)} threads: {e}")
+    finally:
+        try:
+            if page:
+                await page.close()
+        except Exception:
+            pass
+        await results.put(None)
+
+async def harvest_replies(context, url, pending, tabs, image_dir, on_result, budget=None, resource_profile="full"):
+    """Expands and extracts the pending threads in `tabs` parallel tabs of context.
+
+    pending is a list of (fingerprint, reply_count, offset) tuples; offset is the
+    list position Phase 1 saw the thread at (or None). Each tab gets a
+    contiguous run of threads in list order so it only ever scrolls forward.
+    on_result(fingerprint, replies) is awaited for each result as it arrives,
+    one at a time (replies is None if the tab could not find the thread), so
+    callers can merge into their store without locking. Returns the number of
+    threads reported back.
+    """
+    ordered = sorted(pending, key=lambda t: (t[2] is None, t[2] or 0))
+    tabs = max(1, min(tabs, len(ordered)))
+    size = math.ceil(len(ordered) / tabs)
+    results = asyncio.Queue()
+    started = time.time()
+    workers = [
+        asyncio.create_task(_harvest_worker(
+            i, context, url, ordered[i * size:(i + 1) * size], results, image_dir, budget, resource_profile))
+        for i in range(tabs)
+    ]
+
+    reported = 0
+    running = len(workers)
+    try:
+        while running:
+            item = await results.get()
+            if item is None:
+                # A worker finished (or gave up)
+                running -= 1
+                continue
+            await on_result(*item)
+            reported += 1
+    finally:
+        for w in workers:
+            w.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    print(f"Reply harvest: {reported}/{len(ordered)} threads across {tabs} tabs in {time.time() - started:.1f}s")
+    return reported
@@ -0,0 +1,94 @@
+from urllib.parse import urlparse
+
+# Video CDNs and analytics / monitoring beacons
+_VIDEO_AND_TRACKING_HOSTS = [
+    "douyinvod.com", "bytevod", "mcs.zijieapi.com", "mon.zijieapi.com",
+    "mcs.snssdk.com", "mssdk", "slardar", "google-analytics.com", "googletagmanager.com",
+]
+
+# Video segments, telemetry endpoints and feeds for the next/related videos
+_NON_ESSENTIAL_URL_PARTS = [
+    ".mp4", ".m4s", ".m3u8", "mime_type=video", "/monitor_browser/", "/web/report",
+    "/aweme/v1/web/related/", "/aweme/v1/web/tab/feed", "/webcast/",
+]
+
+# Request-routing profiles for scrape sessions. Each profile lists what to abort;
+# everything else is let through. DOM-mode profiles must keep comment images,
+# because the extractor needs them decoded (naturalWidth) to pick them up.
+RESOURCE_PROFILES = {
+    # Load everything, like a normal browser
+    "full": None,
+
+    # Only what the comment panel needs: no video, fonts, analytics, avatars/covers
+    "comments-only": {
+        "resource_types": {"media", "font", "texttrack", "manifest", "eventsource", "websocket"},
+        "hosts": _VIDEO_AND_TRACKING_HOSTS,
+        "url_parts": _NON_ESSENTIAL_URL_PARTS,
+        # Images matching these are decoration (avatars, covers, stickers)
+        "image_url_parts": ["aweme-avatar", "/aweme/100x100/", "/aweme/720x720/", "cover", "/obj/douyin-pc-web/"],
+    },
+
+    # For network capture: the comment API drives everything, so no images at all
+    # except the ones the downloader fetches itself (outside the browser)
+    "api-only": {
+        "resource_types": {"media", "font", "texttrack", "manifest", "eventsource", "websocket", "image"},
+        "hosts": _VIDEO_AND_TRACKING_HOSTS,
+        "url_parts": _NON_ESSENTIAL_URL_PARTS,
+        "image_url_parts": [],
+    },
+}
+
+def should_block(profile, resource_type, url):
+    """Decides whether a request is aborted under profile (a RESOURCE_PROFILES value)."""
+    if not profile:
+        return False
+    if resource_type in profile["resource_types"]:
+        return True
+    host = urlparse(url).netloc
+    if any(h in host for h in profile["hosts"]):
+        return True
+    if any(part in url for part in profile["url_parts"]):
+        return True
+    if resource_type == "image" and any(part in url for part in profile["image_url_parts"]):
+        return True
+    return False
+
+class ResourceBlocker:
+    """Installs a profile on a Context or Page via route() and counts what it blocked."""
+
+    def __init__(self, profile_name):
+        if profile_name not in RESOURCE_PROFILES:
+            raise ValueError(f"Unknown resource profile '{profile_name}'. Choose from: {', '.join(RESOURCE_PROFILES)}")
+        self.profile_name = profile_name
+        self.profile = RESOURCE_PROFILES[profile_name]
+        self.blocked = 0
+        self.allowed = 0
+        self.blocked_by_type = {}
+
+    async def install(self, target):
+        """target is a BrowserContext (all its pages) or a single Page."""
+        if self.profile:
+            await target.route("**/*", self._handle)
+            print(f"Resource profile '{self.profile_name}' active.")
+        return self
+
+    def _count(self, request):
+        if should_block(self.profile, request.resource_type, request.url):
+            self.blocked += 1
+            self.blocked_by_type[request.resource_type] = self.blocked_by_type.get(request.resource_type, 0) + 1
+            return True
+        self.allowed += 1
+        return False
+
+    async def _handle(self, route):
+        try:
+            if self._count(route.request):
+                await route.abort()
+            else:
+                await route.continue_()
+        except Exception:
+            pass  # page closed while the request was in flight
+
+    def summary(self):
+        by_type = ", ".join(f"{k}={v}" for k, v in sorted(self.blocked_by_type.items()))
+        return f"Resource profile '{self.profile_name}': blocked {self.blocked}, allowed {self.allowed} ({by_type})"
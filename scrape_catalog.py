@@ -0,0 +1,256 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+# SQLite catalog of everything under scraped_data/: one row per video, one per
+# scrape run (with its stats) and, optionally, the comments themselves.
+# manifest.json is generated from the videos table for douyin-web.
+#
+#   python scrape_catalog.py runs               # recent runs and their stats
+#   python scrape_catalog.py import-comments    # backfill comments from comments.json files
+
+CATALOG_FILE = "catalog.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    id TEXT PRIMARY KEY,
+    url TEXT,
+    title TEXT,
+    first_scraped TEXT,
+    last_scraped TEXT,
+    comment_count INTEGER DEFAULT 0,
+    reply_count INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    video_id TEXT NOT NULL REFERENCES videos(id),
+    started TEXT NOT NULL,
+    finished TEXT,
+    status TEXT NOT NULL,
+    capture TEXT,
+    duration REAL,
+    comments INTEGER,
+    new_comments INTEGER,
+    replies INTEGER,
+    captcha_pauses INTEGER,
+    captcha_seconds REAL,
+    blocked_requests INTEGER,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_video ON runs(video_id);
+CREATE TABLE IF NOT EXISTS comments (
+    video_id TEXT NOT NULL,
+    thread INTEGER NOT NULL,
+    reply INTEGER NOT NULL,
+    cid TEXT,
+    user TEXT,
+    reply_to TEXT,
+    content TEXT,
+    time TEXT,
+    location TEXT,
+    image_path TEXT,
+    PRIMARY KEY (video_id, thread, reply)
+);
+CREATE INDEX IF NOT EXISTS comments_user ON comments(user);
+CREATE INDEX IF NOT EXISTS comments_location ON comments(location);
+CREATE TABLE IF NOT EXISTS short_links (
+    url TEXT PRIMARY KEY,
+    video_id TEXT NOT NULL,
+    resolved TEXT
+);
+"""
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+class ScrapeCatalog:
+    """One connection to scraped_data/catalog.sqlite3.
+
+    Connections are per thread (batch workers each open their own); concurrent
+    writers are serialized by SQLite itself, so no extra file locking is needed.
+    """
+
+    def __init__(self, base_dir, store_comments=None):
+        self.base_dir = base_dir
+        os.makedirs(base_dir, exist_ok=True)
+        if store_comments is None:
+            store_comments = os.getenv("CATALOG_COMMENTS", "").lower() in ("1", "true", "yes")
+        self.store_comments = store_comments
+        # Autocommit; writes use explicit BEGIN IMMEDIATE so they take the write lock up front.
+        # Owners never use one catalog from two threads at once, but may hand it
+        # to a worker thread (e.g. async_scraper's short-link resolution).
+        self.conn = sqlite3.connect(os.path.join(base_dir, CATALOG_FILE), timeout=60, isolation_level=None,
+                                    check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._import_manifest()
+
+    def close(self):
+        self.conn.close()
+
+    def _write(self):
+        return _WriteTransaction(self.conn)
+
+    def _import_manifest(self):
+        """Seeds an empty catalog from a manifest.json written before the catalog existed."""
+        manifest_path = os.path.join(self.base_dir, "manifest.json")
+        if not os.path.exists(manifest_path):
+            return
+        with self._write():
+            if self.conn.execute("SELECT 1 FROM videos LIMIT 1").fetchone():
+                return
+            try:
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+            except Exception as e:
+                print(f"Could not import {manifest_path}: {e}")
+                return
+            for entry in manifest:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO videos (id, url, title, first_scraped, last_scraped, comment_count) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (entry["id"], entry.get("url"), entry.get("title"), entry.get("scrape_date"),
+                     entry.get("scrape_date"), entry.get("comment_count", 0)))
+        print(f"Imported {len(manifest)} manifest entries into the scrape catalog.")
+
+    def start_run(self, video_id, url, capture=None):
+        """Registers a scrape run as 'running' and returns its id."""
+        with self._write():
+            self.conn.execute("INSERT OR IGNORE INTO videos (id, url, first_scraped) VALUES (?, ?, ?)",
+                              (video_id, url, _now()))
+            cursor = self.conn.execute(
+                "INSERT INTO runs (video_id, started, status, capture) VALUES (?, ?, 'running', ?)",
+                (video_id, _now(), capture))
+        return cursor.lastrowid
+
+    def finish_run(self, run_id, video_id, url, title, comments, stats):
+        """Records a successful run, refreshes the video row and regenerates manifest.json.
+
+        stats holds the runs columns: duration, new_comments, captcha_pauses,
+        captcha_seconds, blocked_requests.
+        """
+        replies = sum(len(c.get("replies", [])) for c in comments)
+        now = _now()
+        with self._write():
+            self.conn.execute(
+                "UPDATE runs SET finished = ?, status = 'ok', duration = ?, comments = ?, new_comments = ?, "
+                "replies = ?, captcha_pauses = ?, captcha_seconds = ?, blocked_requests = ? WHERE id = ?",
+                (now, stats.get("duration"), len(comments), stats.get("new_comments"), replies,
+                 stats.get("captcha_pauses"), stats.get("captcha_seconds"), stats.get("blocked_requests"), run_id))
+            self.conn.execute(
+                "UPDATE videos SET url = ?, title = ?, last_scraped = ?, comment_count = ?, reply_count = ? WHERE id = ?",
+                (url, title, now, len(comments), replies, video_id))
+            if self.store_comments:
+                self._replace_comments(video_id, comments)
+            # Generated while holding the write lock, so concurrent runs publish in commit order
+            self.write_manifest()
+
+    def fail_run(self, run_id, error):
+        with self._write():
+            self.conn.execute("UPDATE runs SET finished = ?, status = 'failed', error = ? WHERE id = ?",
+                              (_now(), str(error)[:500], run_id))
+
+    def _replace_comments(self, video_id, comments):
+        self.conn.execute("DELETE FROM comments WHERE video_id = ?", (video_id,))
+        rows = []
+        for t, c in enumerate(comments):
+            # reply -1 is the top-level comment itself
+            for r, item in [(-1, c)] + list(enumerate(c.get("replies", []))):
+                rows.append((video_id, t, r, item.get("cid"), item.get("user"), item.get("reply_to"),
+                             item.get("content"), item.get("time"), item.get("location"), item.get("image_path")))
+        self.conn.executemany(
+            "INSERT INTO comments (video_id, thread, reply, cid, user, reply_to, content, time, location, image_path) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def import_comments(self, video_id):
+        """Loads scraped_data/<video_id>/comments.json into the comments table."""
+        path = os.path.join(self.base_dir, video_id, "comments.json")
+        with open(path, 'r', encoding='utf-8') as f:
+            comments = json.load(f)
+        with self._write():
+            self._replace_comments(video_id, comments)
+        return len(comments)
+
+    def cached_video_id(self, url):
+        """The canonical video id a short link resolved to before, if any (see video_ids.py)."""
+        row = self.conn.execute("SELECT video_id FROM short_links WHERE url = ?", (url,)).fetchone()
+        return row["video_id"] if row else None
+
+    def remember_video_id(self, url, video_id):
+        with self._write():
+            self.conn.execute("INSERT OR REPLACE INTO short_links (url, video_id, resolved) VALUES (?, ?, ?)",
+                              (url, video_id, _now()))
+
+    def manifest_entries(self):
+        rows = self.conn.execute(
+            "SELECT id, url, title, last_scraped, comment_count FROM videos "
+            "WHERE last_scraped IS NOT NULL ORDER BY last_scraped DESC").fetchall()
+        return [{"id": r["id"], "url": r["url"], "title": r["title"], "scrape_date": r["last_scraped"],
+                 "comment_count": r["comment_count"]} for r in rows]
+
+    def write_manifest(self):
+        """Writes manifest.json (most recent first), in the format douyin-web reads."""
+        manifest_path = os.path.join(self.base_dir, "manifest.json")
+        tmp_path = f"{manifest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest_entries(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, manifest_path)
+
+    def recent_runs(self, limit=20, video_id=None):
+        query = "SELECT * FROM runs"
+        params = []
+        if video_id:
+            query += " WHERE video_id = ?"
+            params.append(video_id)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        return [dict(r) for r in self.conn.execute(query, params).fetchall()]
+
+class _WriteTransaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or maintain the scraped_data catalog.")
+    parser.add_argument("command", choices=["runs", "manifest", "import-comments"])
+    parser.add_argument("--base-dir", default=os.path.join(os.getcwd(), "scraped_data"))
+    parser.add_argument("--video", help="Limit to one video id")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    catalog = ScrapeCatalog(args.base_dir)
+    try:
+        if args.command == "runs":
+            for run in catalog.recent_runs(args.limit, args.video):
+                duration = f"{run['duration']:.0f}s" if run["duration"] else "-"
+                print(f"#{run['id']:<5} {run['started']}  {run['video_id']:<24} {run['status']:<8} {duration:>7}  "
+                      f"comments={run['comments']} new={run['new_comments']} replies={run['replies']} "
+                      f"captcha={run['captcha_pauses']}")
+        elif args.command == "manifest":
+            catalog.write_manifest()
+            print(f"Wrote manifest.json with {len(catalog.manifest_entries())} videos.")
+        else:
+            video_ids = [args.video] if args.video else [e["id"] for e in catalog.manifest_entries()]
+            started = time.time()
+            for video_id in video_ids:
+                try:
+                    print(f"{video_id}: {catalog.import_comments(video_id)} threads")
+                except FileNotFoundError:
+                    print(f"{video_id}: no comments.json, skipped")
+            print(f"Imported {len(video_ids)} videos in {time.time() - started:.1f}s")
+    finally:
+        catalog.close()
@@ -1,247 +1,926 @@
+import asyncio
 import json
 import time
-import random
 import re
 import os
-import requests
-import hashlib
 from datetime import datetime
-from urllib.parse import urlparse
 from dotenv import load_dotenv
-from playwright.sync_api import sync_playwright
+from playwright.async_api import async_playwright
+from douyin_api import CommentResponseCollector
+from image_downloader import get_image_downloader
+from comment_store import CommentStore, ScrapeCheckpoint
+from comment_identity import SeenSet, content_fingerprint
+from page_waits import Pacing, ClickBudget, act_and_wait
+from resource_blocking import ResourceBlocker
+from browser_service import open_session_async, login_recently_verified
+from scrape_catalog import ScrapeCatalog
+from scrape_metrics import ScrapeMetrics, record_run
+from reply_harvest import harvest_replies
+from video_ids import resolve_video_id, remember_final_url
 
 # Load environment variables
 load_dotenv()
 
-def check_for_verification(page):
-    """Checks for captcha or verification overlays and waits for manual resolution."""
-    verification_selectors = [
-        '.captcha-container',
-        '#captcha_container',
-        '.verify-board',
-        '#captcha_container',
-        '.vc-mask',
-        '.captcha-modal',
-        '[class*="captcha"]',
-        '[class*="verify"]'
-    ]
-    
-    found_any = False
-    for selector in verification_selectors:
+# The scraper runs on playwright.async_api: scrape_douyin_comments_async is the
+# engine (async_scraper.py runs many of them on one event loop) and
+# scrape_douyin_comments is its blocking wrapper. File and database writes go
+# through asyncio.to_thread so a slow disk never stalls the other pages.
+# check_for_verification, verify_login_status and self_extract_comment keep
+# working on playwright.sync_api pages; their *_async twins serve the engine.
+
+VERIFICATION_SELECTORS = [
+    '.captcha-container',
+    '#captcha_container',
+    '.verify-board',
+    '.vc-mask',
+    '.captcha-modal',
+    '[class*="captcha"]',
+    '[class*="verify"]'
+]
+
+# True while a verification overlay (selectors above, or a captcha iframe) is visible
+VERIFICATION_DETECT_JS = """
+() => {
+    const visible = (el) => !!el && el.getClientRects().length > 0
+        && getComputedStyle(el).visibility !== 'hidden';
+    for (const s of %s) {
+        for (const el of document.querySelectorAll(s)) {
+            if (visible(el)) return true;
+        }
+    }
+    for (const f of document.querySelectorAll('iframe')) {
+        const src = (f.getAttribute('src') || '').toLowerCase();
+        if (src.includes('captcha') && visible(f)) return true;
+    }
+    return false;
+}
+""" % json.dumps(VERIFICATION_SELECTORS)
+
+# In-page verification watcher. Re-evaluates the overlay state only when the DOM
+# changes (debounced), keeps it in window.__scrapeVerify and pushes transitions
+# to Python through the __scrapeVerifyChanged binding.
+VERIFICATION_WATCH_JS = """
+(() => {
+    if (window.top !== window || window.__scrapeVerify) return;
+    const state = window.__scrapeVerify = { active: false, since: Date.now() };
+    const detect = """ + VERIFICATION_DETECT_JS + """;
+    let queued = false;
+    const update = () => {
+        queued = false;
+        const active = detect();
+        if (active !== state.active) {
+            state.active = active;
+            state.since = Date.now();
+            if (window.__scrapeVerifyChanged) window.__scrapeVerifyChanged(active);
+        }
+    };
+    const schedule = () => {
+        if (!queued) {
+            queued = true;
+            setTimeout(update, 100);
+        }
+    };
+    const start = () => {
+        new MutationObserver(schedule).observe(document.documentElement, {
+            childList: true, subtree: true, attributes: true, attributeFilter: ['class', 'style']
+        });
+        update();
+    };
+    if (document.documentElement) start();
+    else document.addEventListener('DOMContentLoaded', start);
+})()
+"""
+
+class VerificationWatcher:
+    """Push-based captcha/verification detection for one page.
+
+    The in-page watcher notifies Python via an exposed binding, so checking for a
+    verification between scrolls is a flag read with no round-trip at all.
+    """
+
+    def __init__(self, on_pause=None):
+        self.active = False
+        self.bound = False
+        self.pauses = 0
+        self.paused_seconds = 0.0
+        self.on_pause = on_pause  # called with (paused, seconds) around each wait
+
+    async def install(self, page):
         try:
-            el = page.query_selector(selector)
-            if el and el.is_visible():
-                found_any = True
-                break
-        except:
-            continue
-    
-    # Check for captcha iframe if selectors didn't match
-    if not found_any:
+            await page.expose_function("__scrapeVerifyChanged", self._on_change)
+            self.bound = True
+        except Exception as e:
+            print(f"  [DEBUG] Verification binding unavailable, falling back to state reads: {e}")
+        await page.add_init_script(VERIFICATION_WATCH_JS)
         try:
-            iframes = page.query_selector_all('iframe')
-            for iframe in iframes:
-                src = iframe.get_attribute('src') or ""
-                if "verifycenter/captcha" in src or "captcha" in src.lower():
-                    found_any = True
-                    break
-        except:
-             pass
-            
-    if found_any:
-        print("\n!!! VERIFICATION DETECTED !!!")
-        print("Please resolve the captcha/verification in the browser window.")
-        print("Waiting for verification to be dismissed...")
-        last_log = time.time()
+            await page.evaluate(VERIFICATION_WATCH_JS)
+        except Exception:
+            pass  # the init script covers the next navigation
+
+    def _on_change(self, active):
+        self.active = bool(active)
+
+    async def is_active(self, page):
+        if self.bound:
+            return self.active
+        try:
+            return bool(await page.evaluate("() => !!(window.__scrapeVerify && window.__scrapeVerify.active)"))
+        except Exception:
+            return False
+
+    async def wait_until_cleared(self, page):
+        """Waits until the overlay is gone; resumes the moment the page reports it cleared."""
+        started = time.time()
+        self.pauses += 1
+        if self.on_pause:
+            self.on_pause(True, 0.0)
         while True:
-            still_visible = False
-            for selector in verification_selectors:
-                try:
-                    el = page.query_selector(selector)
-                    if el and el.is_visible():
-                        still_visible = True
-                        break
-                except:
-                    continue
-            if not still_visible:
-                print("Verification cleared. Resuming...\n")
+            try:
+                await page.wait_for_function(
+                    "() => !(window.__scrapeVerify && window.__scrapeVerify.active)",
+                    polling=250, timeout=10000
+                )
                 break
-            if time.time() - last_log > 10:
+            except Exception:
                 print("...Still waiting for verification...")
-                last_log = time.time()
-            time.sleep(2)
+        self.active = False
+        self.paused_seconds += time.time() - started
+        if self.on_pause:
+            self.on_pause(False, time.time() - started)
+
+def _verification_detected():
+    print("\n!!! VERIFICATION DETECTED !!!")
+    print("Please resolve the captcha/verification in the browser window.")
+    print("Waiting for verification to be dismissed...")
+
+def _overlay_visible(page):
+    # Awaitable for async pages, a plain bool for sync_api ones
+    return page.evaluate(VERIFICATION_DETECT_JS)
+
+async def check_for_verification_async(page, watcher=None):
+    """Checks for captcha or verification overlays and waits for manual resolution.
+
+    With a VerificationWatcher installed on the page this is a flag check;
+    otherwise the overlay is re-detected in-page every 2 seconds.
+    """
+    if watcher is not None:
+        if not await watcher.is_active(page):
+            return False
+        _verification_detected()
+        await watcher.wait_until_cleared(page)
+        print("Verification cleared. Resuming...\n")
+        return True
+
+    try:
+        if not await _overlay_visible(page):
+            return False
+    except Exception:
+        return False
+    _verification_detected()
+    last_log = time.time()
+    while True:
+        await asyncio.sleep(2)
+        try:
+            if not await _overlay_visible(page):
+                break
+        except Exception:
+            break  # navigated away with the overlay
+        if time.time() - last_log > 10:
+            print("...Still waiting for verification...")
+            last_log = time.time()
+    print("Verification cleared. Resuming...\n")
+    return True
+
+def check_for_verification(page):
+    """check_for_verification_async for playwright.sync_api pages (same in-page detector)."""
+    try:
+        if not _overlay_visible(page):
+            return False
+    except Exception:
+        return False
+    _verification_detected()
+    last_log = time.time()
+    while True:
+        time.sleep(2)
+        try:
+            if not _overlay_visible(page):
+                break
+        except Exception:
+            break
+        if time.time() - last_log > 10:
+            print("...Still waiting for verification...")
+            last_log = time.time()
+    print("Verification cleared. Resuming...\n")
+    return True
+
+# Login state in one round-trip. The sidebar 'Me' link exists even for guests,
+# so a visible "登录/Login" button is checked first; only without one does the
+# self profile link count as logged in. Anything else is still loading.
+LOGIN_STATE_JS = """
+() => {
+    // Same test as Playwright's is_visible(): a box on screen and not visibility:hidden.
+    // (offsetParent is null for position:fixed elements, which the login button can be.)
+    const visible = (el) => el.getClientRects().length > 0 && getComputedStyle(el).visibility !== 'hidden';
+    const loginButton = Array.from(document.querySelectorAll('button, .login-button'))
+        .find((el) => visible(el) && /登录|Login/.test(el.innerText || ''));
+    return {
+        guest: loginButton ? (loginButton.innerText || '').trim() : null,
+        profile: !!document.querySelector('a[href*="//www.douyin.com/user/self"]'),
+        modal: !!(document.querySelector('.login-mask') || document.querySelector('#login-full-panel')),
+    };
+}
+"""
+
+def _report_login_state(state):
+    """Prints what the LOGIN_STATE_JS result shows; True once logged in."""
+    if state["guest"] is not None:
+        print(f"   (Detected Login Button: '{state['guest']}')")
+        print(">> NOT LOGGED IN. Please log in via the browser window.")
+        print("   (Waiting for 'Login' button to disappear...)")
+    elif state["profile"]:
+        print(">> SUCCESS: Login verified (No 'Login' button & Profile Link found).")
         return True
+    else:
+        # If neither login button nor profile link... maybe page loading?
+        print("   (Page loading or indeterminate state...)")
+    if state["modal"]:
+        print("   (Login modal is visible - Please scan QR code)")
     return False
 
+_LOGIN_STATE_NAVIGATING = {"guest": None, "profile": False, "modal": False}
+
+async def verify_login_status_async(page):
+    print("Verifying login status...")
+    while True:
+        try:
+            state = await page.evaluate(LOGIN_STATE_JS)
+        except Exception:
+            state = _LOGIN_STATE_NAVIGATING
+        if _report_login_state(state):
+            return True
+        await asyncio.sleep(3)
+
 def verify_login_status(page):
+    """verify_login_status_async for playwright.sync_api pages."""
     print("Verifying login status...")
     while True:
-        # 1. Negative Check: "Login" button (Prioritized)
-        # The Sidebar 'Me' link exists even for guests, so we CANNOT rely on it as a positive indicator alone.
-        # We must first ensure there is NO 'Login' button.
-        is_guest = False
         try:
-             login_elements = page.query_selector_all('button, .login-button')
-             for el in login_elements:
-                 if el.is_visible() and ("登录" in el.inner_text() or "Login" in el.inner_text()):
-                     print(f"   (Detected Login Button: '{el.inner_text().strip()}')")
-                     is_guest = True
-                     break
-        except:
-            pass
-            
-        if is_guest:
-             print(">> NOT LOGGED IN. Please log in via the browser window.")
-             print("   (Waiting for 'Login' button to disappear...)")
-        else:
-            # 2. Positive Check: NOW we can check for User Profile
-            # But we must be careful. If we are here, at least the explicit "Login" button is gone.
-            if page.query_selector('a[href*="//www.douyin.com/user/self"]'):
-                print(">> SUCCESS: Login verified (No 'Login' button & Profile Link found).")
-                return True
-            else:
-                # If neither login button nor profile link... maybe page loading?
-                print("   (Page loading or indeterminate state...)")
-             
-        # Check for blocking modal
-        if page.query_selector('.login-mask') or page.query_selector('#login-full-panel'):
-             print("   (Login modal is visible - Please scan QR code)")
-             
+            state = page.evaluate(LOGIN_STATE_JS)
+        except Exception:
+            state = _LOGIN_STATE_NAVIGATING
+        if _report_login_state(state):
+            return True
         time.sleep(3)
 
-        # Check for blocking modal
-        if page.query_selector('.login-mask') or page.query_selector('#login-full-panel'):
-             print("   (Login modal is visible - Please scan QR code)")
-             
-        time.sleep(3)
+# Visible reply expansion controls under `root`: "展开N条回复 / 展开更多 /
+# 更多回复 / 查看…", innermost match only, never "收起". Shared by the extractor
+# (has_expander) and EXPAND_STEP_JS so both agree on what can be expanded.
+EXPANSION_CONTROLS_JS = """
+(root) => {
+    const isExpansion = (text) => {
+        if (!text || text.includes('收起')) return false;
+        if (!/展开|更多|条回复|查看/.test(text)) return false;
+        if (/回复|分享|赞/.test(text)) return /展开\\d+条回复|展开更多|更多回复/.test(text);
+        return true;
+    };
+    const matches = Array.from(root.querySelectorAll('button, [role="button"], span, p')).filter((el) => {
+        if (el.offsetParent === null) return false;
+        return isExpansion((el.innerText || '').trim());
+    });
+    return matches.filter((el) => !matches.some((other) => other !== el && el.contains(other)));
+}
+"""
 
-def self_extract_comment(item, image_dir=None):
+# In-page extractor for a single [data-e2e="comment-item"] node. Runs entirely
+# inside the browser so one comment costs one round-trip instead of a dozen.
+COMMENT_ITEM_JS = """
+(item) => {
+    const text = (el) => (el ? (el.innerText || '').trim() : '');
+    const expansionControls = """ + EXPANSION_CONTROLS_JS + """;
+
+    // Nickname: "A reply to B" renders as two links inside the name block
+    const userEl = item.querySelector('._uYOTNYZ');
+    let user = null;
+    let replyTo = null;
+    if (userEl) {
+        const links = userEl.querySelectorAll('a');
+        if (links.length >= 2) {
+            user = text(links[0]);
+            replyTo = text(links[1]);
+        } else {
+            user = text(userEl);
+        }
+    }
+
+    const contentEl = item.querySelector('.C7LroK_h');
+
+    // Meta ("3分钟前 · 广东"), falling back to a span scan
+    let metaEl = item.querySelector('.fJhvAqos');
+    if (!metaEl) {
+        for (const sp of item.querySelectorAll('span')) {
+            const t = sp.innerText || '';
+            if (t.includes('·') && (t.includes('前') || t.includes('20'))) {
+                metaEl = sp;
+                break;
+            }
+        }
+    }
+
+    // First real (non-icon) image
+    let imageSrc = null;
+    for (const img of item.querySelectorAll('img')) {
+        if (img.naturalWidth > 30) {
+            const src = img.getAttribute('src');
+            if (src && src.startsWith('http')) {
+                imageSrc = src;
+                break;
+            }
+        }
+    }
+
+    // Native comment id, if the list item's React props expose it
+    let cid = null;
+    try {
+        const fiberKey = Object.keys(item).find((k) => k.startsWith('__reactFiber'));
+        let fiber = fiberKey ? item[fiberKey] : null;
+        for (let depth = 0; fiber && depth < 8 && !cid; depth++, fiber = fiber.return) {
+            const props = fiber.memoizedProps || {};
+            const data = props.comment || props.commentInfo || props.data || props;
+            if (data && data.cid) cid = String(data.cid);
+        }
+    } catch (e) {}
+
+    // Reply count from the "展开N条回复" control, and whether any expansion
+    // control is showing at all (top-level items only)
+    const isReply = !!item.closest('.replyContainer');
+    let replyCount = 0;
+    let hasExpander = false;
+    if (!isReply) {
+        const m = (item.innerText || '').match(/展开(\\d+)条回复/);
+        if (m) replyCount = parseInt(m[1], 10);
+        hasExpander = expansionControls(item).length > 0;
+    }
+
+    // Stable handle for re-locating this node later, and its scroll offset
+    if (!item.dataset.scrapeTag) {
+        window.__scrapeTagSeq = (window.__scrapeTagSeq || 0) + 1;
+        item.dataset.scrapeTag = String(window.__scrapeTagSeq);
+    }
+    const container = item.closest('.comment-mainContent');
+    const offset = container
+        ? Math.round(item.getBoundingClientRect().top - container.getBoundingClientRect().top + container.scrollTop)
+        : null;
+
+    return {
+        cid: cid,
+        user: user,
+        reply_to: replyTo,
+        content: contentEl ? text(contentEl) : null,
+        meta: metaEl ? (metaEl.innerText || '') : '',
+        image_src: imageSrc,
+        is_reply: isReply,
+        reply_count: replyCount,
+        has_expander: hasExpander,
+        tag: item.dataset.scrapeTag,
+        offset: offset
+    };
+}
+"""
+
+# Batch version: extracts every comment item under `root` (or the whole
+# document) in a single page.evaluate and returns them as a JSON array.
+EXTRACT_COMMENTS_JS = """
+(root) => {
+    const extract = """ + COMMENT_ITEM_JS + """;
+    const scope = root || document;
+    return Array.from(scope.querySelectorAll('[data-e2e="comment-item"]'), (el) => extract(el));
+}
+"""
+
+def _clean_author_tag(name):
+    """Normalizes the '\\n作者' badge into a trailing ' [Author]' marker."""
+    if name and "\n作者" in name:
+        return name.replace("\n作者", "").strip() + " [Author]"
+    return name
+
+def _download_comment_image(src, image_dir):
+    """Queues a comment image for background download and returns its relative path."""
+    try:
+        return get_image_downloader().submit(src, image_dir)
+    except Exception as e:
+        print(f"  [DEBUG] Could not queue image {src}: {e}")
+        return None
+
+def _prune_missing_images(comments, target_dir):
+    """Clears image_path on records whose download never landed."""
+    for c in comments:
+        if c.get("image_path") and not os.path.exists(os.path.join(target_dir, c["image_path"])):
+            c["image_path"] = None
+        _prune_missing_images(c.get("replies", []), target_dir)
+
+def build_comment_record(raw, image_dir=None):
+    """Turns one raw in-page extraction result into a comment record."""
+    if not raw or raw.get("content") is None:
+        return None
+
+    user_text = raw.get("user")
+    user_text = "Unknown" if user_text is None else _clean_author_tag(user_text)
+    reply_to = _clean_author_tag(raw.get("reply_to"))
+
+    msg_time = ""
+    msg_location = ""
+    meta_text = raw.get("meta") or ""
+    if "·" in meta_text:
+        parts = meta_text.split("·")
+        msg_time = parts[0].strip()
+        msg_location = parts[1].strip() if len(parts) > 1 else ""
+    else:
+        msg_time = meta_text
+
+    image_path = None
+    if image_dir and raw.get("image_src"):
+        image_path = _download_comment_image(raw["image_src"], image_dir)
+
+    record = {
+        "user": user_text,
+        "reply_to": reply_to,
+        "content": raw["content"],
+        "time": msg_time,
+        "location": msg_location,
+        "image_path": image_path,
+        "scrape_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "replies_scraped": False,
+        "replies": []
+    }
+    if raw.get("cid"):
+        record["cid"] = raw["cid"]
+    if raw.get("reply_count"):
+        record["reply_count"] = raw["reply_count"]
+    return record
+
+async def self_extract_comment_async(item, image_dir=None):
     """Helper to extract data from a single comment/reply item."""
     try:
-        # Nickname extraction
-        user_el = item.query_selector('._uYOTNYZ')
-        user_text = "Unknown"
-        reply_to = None
-        
-        if user_el:
-            # Check for "A reply to B" structure (multiple links)
-            links = user_el.query_selector_all('a')
-            if len(links) >= 2:
-                # Format: User A -> User B
-                user_text = links[0].inner_text().strip()
-                reply_to = links[1].inner_text().strip()
-                # print(f"DEBUG: Found reply-to: {user_text} -> {reply_to}")
-            else:
-                user_text = user_el.inner_text().strip()
-
-            # Clean Author tag
-            if "\n作者" in user_text:
-                user_text = user_text.replace("\n作者", "").strip() + " [Author]"
-            if reply_to and "\n作者" in reply_to:
-                reply_to = reply_to.replace("\n作者", "").strip() + " [Author]"
-
-        # Content extraction
-        content_el = item.query_selector('.C7LroK_h')
-        content_text = content_el.inner_text().strip() if content_el else "[No Content]"
-        if content_text == "[No Content]": return None
-
-        # Meta extraction
-        msg_time = ""
-        msg_location = ""
+        return build_comment_record(await item.evaluate(COMMENT_ITEM_JS), image_dir)
+    except:
+        return None
+
+def self_extract_comment(item, image_dir=None):
+    """self_extract_comment_async for playwright.sync_api element handles."""
+    try:
+        return build_comment_record(item.evaluate(COMMENT_ITEM_JS), image_dir)
+    except:
+        return None
+
+async def extract_visible_comments(target, image_dir=None, include_replies=False, with_raw=False):
+    """Extracts every comment item under target (a Page or ElementHandle) in one round-trip.
+
+    Top-level comments only unless include_replies is set. With with_raw, returns
+    (record, raw) pairs so callers can use the in-page tag, offset and reply count.
+    """
+    try:
+        raw_items = await target.evaluate(EXTRACT_COMMENTS_JS) or []
+    except Exception as e:
+        print(f"  [DEBUG] Batch extraction failed: {e}")
+        return []
+    return records_from_raw(raw_items, image_dir, include_replies, with_raw)
+
+def records_from_raw(raw_items, image_dir=None, include_replies=False, with_raw=False):
+    """Post-processes an EXTRACT_COMMENTS_JS result (see extract_visible_comments)."""
+    records = []
+    for raw in raw_items:
+        if raw.get("is_reply") and not include_replies:
+            continue
+        record = build_comment_record(raw, image_dir)
+        if record:
+            records.append((record, raw) if with_raw else record)
+    return records
+
+# Finds the comment panel's sort control and picks newest-first. Returns true
+# once a "最新"/"按时间" option has been clicked.
+SORT_NEWEST_JS = """
+() => {
+    const panel = document.querySelector('.comment-mainContent')?.parentElement || document.body;
+    const find = (labels) => Array.from(panel.querySelectorAll('span, div, button, li, p'))
+        .find((el) => el.children.length === 0 && labels.includes((el.innerText || '').trim()));
+    let option = find(['最新', '按时间']);
+    if (!option) {
+        // Options live in a dropdown opened from the current sort label
+        const toggle = find(['最热', '按热度', '默认']);
+        if (toggle) toggle.click();
+        option = find(['最新', '按时间']);
+    }
+    if (!option) return false;
+    option.click();
+    return true;
+}
+"""
+
+async def switch_to_newest_first(page, pacing):
+    """Switches the comment list to newest-first and waits for it to re-render."""
+    try:
+        result = {}
+        async def click_sort():
+            result["ok"] = await page.evaluate(SORT_NEWEST_JS)
+        await act_and_wait(page, click_sort, pacing.scroll_timeout, pacing.scroll_floor, pacing)
+        return bool(result.get("ok"))
+    except Exception as e:
+        print(f"  [DEBUG] Sort switch failed: {e}")
+        return False
+
+# Picks the comment list's scroll container: visible candidates only, the one
+# marked scrollable="true" first, otherwise the largest scrollHeight.
+RESOLVE_CONTAINER_JS = """
+() => {
+    const candidates = Array.from(document.querySelectorAll(
+        '.comment-mainContent, [data-e2e="comment-list"], .comment-list-container'
+    )).filter((el) => {
+        const rect = el.getBoundingClientRect();
+        return el.offsetParent !== null && rect.width > 100 && rect.height > 100;
+    });
+    if (!candidates.length) return null;
+    return candidates.find((el) => el.getAttribute('scrollable') === 'true')
+        || candidates.sort((a, b) => b.scrollHeight - a.scrollHeight)[0];
+}
+"""
+
+# Scroll operations. Each returns [scrollHeight, scrollTop] after scrolling, or
+# null once the element has been detached so the tracker knows to re-resolve.
+SCROLL_OPS_JS = {
+    "bottom": "(el) => { if (!el.isConnected) return null; el.scrollTop = el.scrollHeight; return [el.scrollHeight, el.scrollTop]; }",
+    "to": "(el, y) => { if (!el.isConnected) return null; el.scrollTop = Math.max(0, y); return [el.scrollHeight, el.scrollTop]; }",
+    "by": "(el, dy) => { if (!el.isConnected) return null; el.scrollTop += dy; return [el.scrollHeight, el.scrollTop]; }",
+}
+
+# True once comment items are rendered inside the container's visible window;
+# a virtualized list fills it a frame or two after a jump.
+ROWS_RENDERED_JS = """
+(root) => {
+    const top = root.getBoundingClientRect().top;
+    const bottom = top + root.clientHeight;
+    return Array.from(root.querySelectorAll('[data-e2e="comment-item"]')).some((item) => {
+        const rect = item.getBoundingClientRect();
+        return rect.bottom > top && rect.top < bottom;
+    });
+}
+"""
+
+class ScrollContainer:
+    """Keeps a handle on the comment list's scroll container across scrolls.
+
+    The container is resolved in one evaluate, then reused; it is only looked
+    up again after navigation or when a scroll reports it detached. Scroll
+    methods return the new scrollHeight, or None if there is no container;
+    scroll_top is the offset the last scroll landed on.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.handle = None
+        self.resolves = 0
+        self.scroll_top = 0
+        self._url = None
+
+    async def resolve(self):
         try:
-            meta_el = item.query_selector('.fJhvAqos')
-            if not meta_el:
-                 spans = item.query_selector_all('span')
-                 for sp in spans:
-                      txt = sp.inner_text()
-                      if "·" in txt and ("前" in txt or "20" in txt):
-                          meta_el = sp
-                          break
-            if meta_el:
-                meta_text = meta_el.inner_text()
-                if "·" in meta_text:
-                    parts = meta_text.split("·")
-                    msg_time = parts[0].strip()
-                    msg_location = parts[1].strip() if len(parts) > 1 else ""
-                else:
-                    msg_time = meta_text
-        except: pass
+            self.handle = (await self.page.evaluate_handle(RESOLVE_CONTAINER_JS)).as_element()
+        except Exception as e:
+            print(f"  [DEBUG] Container lookup error: {e}")
+            self.handle = None
+        self._url = self.page.url
+        self.resolves += 1
+        return self.handle
+
+    async def element(self):
+        """The current handle (resolving if needed), for waits that observe the list."""
+        if self.handle is None or self.page.url != self._url:
+            await self.resolve()
+        return self.handle
 
-        # Image extraction
-        image_path = None
-        if image_dir:
+    async def _scroll(self, op, arg=None):
+        for _ in range(2):
+            handle = await self.element()
+            if handle is None:
+                return None
             try:
-                img_els = item.query_selector_all('img')
-                for img in img_els:
-                    width = img.evaluate("el => el.naturalWidth")
-                    if width > 30: 
-                        src = img.get_attribute('src')
-                        if src and src.startswith('http'):
-                            url_hash = hashlib.md5(src.encode()).hexdigest()
-                            filename = f"{url_hash}.jpg"
-                            local_path = os.path.join(image_dir, filename)
-                            if not os.path.exists(local_path):
-                                response = requests.get(src, timeout=10)
-                                if response.status_code == 200:
-                                    with open(local_path, 'wb') as img_f:
-                                        img_f.write(response.content)
-                            if os.path.exists(local_path):
-                                image_path = os.path.join("images", filename)
-                            break
+                result = await handle.evaluate(SCROLL_OPS_JS[op], arg)
+            except Exception:
+                result = None  # handle disposed, e.g. the frame navigated
+            if result is not None:
+                height, self.scroll_top = result
+                return height
+            self.handle = None
+        return None
+
+    async def scroll_to_bottom(self):
+        return await self._scroll("bottom")
+
+    async def scroll_to(self, y):
+        return await self._scroll("to", y)
+
+    async def scroll_by(self, dy):
+        return await self._scroll("by", dy)
+
+    async def wait_for_rows(self, timeout):
+        """Waits until rows are rendered where the list is scrolled to. Returns False on timeout."""
+        handle = await self.element()
+        if handle is None:
+            return False
+        try:
+            # Timer polling, not rAF: background tabs in batch runs get no frames
+            await self.page.wait_for_function(ROWS_RENDERED_JS, arg=handle, timeout=timeout * 1000, polling=50)
+            return True
+        except Exception:
+            return False
+
+async def seek_scroll_offset(container, offset, pacing, max_loads=500):
+    """Scrolls a lazily loaded list down to offset without extracting anything on the way.
+
+    Each step jumps as far as the loaded list allows and, if that is short of
+    offset, scrolls to the bottom and waits for the next page to load. Returns
+    the offset reached.
+    """
+    stalled = 0
+    last_height = None
+    for _ in range(max_loads):
+        height = await container.scroll_to(offset)
+        if height is None or container.scroll_top >= offset - 10:
+            break
+        stalled = stalled + 1 if height == last_height else 0
+        if stalled >= 3:
+            break  # list stopped growing: shorter than it was last run
+        last_height = height
+        await act_and_wait(await container.element(), container.scroll_to_bottom,
+                           pacing.scroll_timeout, pacing.scroll_floor, pacing)
+    return container.scroll_top
+
+async def find_thread_element(page, fingerprint):
+    """Returns the handle of the on-screen top-level item matching fingerprint, if any."""
+    for record, raw in await extract_visible_comments(page, with_raw=True):
+        if raw.get("tag") and content_fingerprint(record) == fingerprint:
+            return await page.query_selector(f'[data-scrape-tag="{raw["tag"]}"]')
+    return None
+
+# One expansion step for a thread, done in-page: finds the visible expansion
+# controls (EXPANSION_CONTROLS_JS) and clicks the first, unless `expected`
+# replies are already loaded.
+REPLY_COUNT_JS = "(root) => root.querySelectorAll('.replyContainer [data-e2e=\"comment-item\"]').length"
+EXPAND_STEP_JS = """
+(root, expected) => {
+    const buttons = (""" + EXPANSION_CONTROLS_JS + """)(root);
+    const loaded = root.querySelectorAll('.replyContainer [data-e2e="comment-item"]').length;
+    if (!buttons.length || (expected && loaded >= expected)) return { clicked: false, loaded };
+    buttons[0].click();
+    return { clicked: true, loaded, text: (buttons[0].innerText || '').trim() };
+}
+"""
+
+async def expand_replies(target_el, pacing=None, expected=None, budget=None):
+    """Clicks a thread's reply expansion controls until none are left. Returns the click count.
+
+    Each step is a single evaluate that finds and clicks the next control. With
+    expected (the thread's reported reply count) it stops as soon as that many
+    replies are loaded, and allows enough steps for large threads. budget is an
+    optional page_waits.ClickBudget shared with other tabs.
+    """
+    pacing = pacing or Pacing.from_env()
+    max_clicks = max(15, (expected or 0) // 5 + 5)
+    clicks = 0
+    stalled = 0
+    last_loaded = -1
+    
+    while clicks < max_clicks:
+        step = {}
+        if budget:
+            await budget.acquire()
+        async def click_next():
+            step.update(await target_el.evaluate(EXPAND_STEP_JS, expected or 0))
+        try:
+            # Returns as soon as the replies render (or loading ends)
+            await act_and_wait(target_el, click_next, pacing.expand_timeout, pacing.expand_floor, pacing)
+            if not step.get("clicked"):
+                break
+            # Count after the click landed, so the last click is not followed by a redundant one
+            loaded = await target_el.evaluate(REPLY_COUNT_JS)
+        except Exception as e:
+            print(f"    Expansion step failed: {e}")
+            break
+        clicks += 1
+        if expected and loaded >= expected:
+            break
+        # A control that keeps reappearing without loading anything is a dead end
+        stalled = stalled + 1 if loaded <= last_loaded else 0
+        last_loaded = max(last_loaded, loaded)
+        if stalled >= 3:
+            break
+    return clicks
+
+async def extract_thread_replies(target_el, image_dir=None):
+    """Extracts the currently loaded replies of one thread."""
+    reply_container = await target_el.query_selector('.replyContainer')
+    if not reply_container:
+        return []
+    return await extract_visible_comments(reply_container, image_dir, include_replies=True)
+
+async def open_comment_panel(page, pacing):
+    """Dismisses login/verification overlays, opens the comment tab and waits for the first items."""
+    # Force open comments if hidden
+    print("Checking comment sidebar visibility...")
+    
+    # 1. Close any blocking modals first
+    blocking_selectors = [
+        '.login-mask', 
+        '#login-full-panel', 
+        '[data-e2e="login-close"]', 
+        '.trust-login-dialog-mask',
+        '.vc-mask'
+    ]
+    
+    for _ in range(5): # Quick initial checks
+        for selector in blocking_selectors:
+            try:
+                modal = await page.query_selector(selector)
+                if modal and await modal.is_visible():
+                    print(f"!!! BLOCKING MODAL DETECTED: {selector} !!!")
+                    # Try to find a close button within or use escape key
+                    close_btn = await modal.query_selector('[class*="close"], [class*="Close"]')
+                    if close_btn:
+                        print("Attempting to click close button...")
+                        await close_btn.click()
+                    else:
+                        print("No clear close button. Pressing Escape...")
+                        await page.keyboard.press("Escape")
+                    await asyncio.sleep(2)
             except: pass
 
-        return {
-            "user": user_text,
-            "reply_to": reply_to,
-            "content": content_text,
-            "time": msg_time,
-            "location": msg_location,
-            "image_path": image_path,
-            "scrape_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "replies_scraped": False,
-            "replies": []
-        }
-    except:
-        return None
+    # 2. Attempt to click comment tab
+    try:
+        # We look for the tab multiple times
+        for attempt in range(5):
+            if await page.is_visible('.comment-mainContent'):
+                print("Comments section is already visible.")
+                break
+                
+            comment_tab = (await page.query_selector('[data-e2e="comment-switch-tab"]')
+                           or await page.query_selector(r'text=/评论\(\d+\)/'))
+            if comment_tab:
+                print(f"Attempt {attempt+1}: Clicking comment tab...")
+                # Use force=True because sometimes Douyin has invisible overlays even after modals are "gone"
+                await comment_tab.click(force=True, timeout=5000)
+                try:
+                    await page.wait_for_selector('.comment-mainContent', state='visible', timeout=pacing.settle_timeout * 1000)
+                    print(">> SUCCESS: Comments tab opened.")
+                    break
+                except Exception:
+                    pass
+            else:
+                print(f"Attempt {attempt+1}: Comment tab not found in DOM yet. Waiting...")
+                await asyncio.sleep(2)
+    except Exception as e:
+        print(f"Tab click warning: {e}")
+        print("Tip: If a login modal is still blocking, please resolve it manually.")
+            
+    try:
+        # Settle: wait for the first comment items instead of a fixed delay
+        await page.wait_for_selector('[data-e2e="comment-item"]', timeout=pacing.settle_timeout * 1000)
+    except Exception:
+        print("  (No comment items rendered yet)")
 
-def update_manifest(base_dir, url_id, url, title, count):
-    """Updates the global manifest.json with the latest scrape info."""
-    manifest_path = os.path.join(base_dir, "manifest.json")
-    manifest = []
+async def locate_thread(page, container, fingerprint, offset=None, pacing=None):
+    """Brings a top-level thread on screen and returns its handle, or None.
+
+    Jumps to offset (the list position where Phase 1 first saw the thread) if
+    known, otherwise scrolls down through the virtualized list looking for it.
+    Each step waits only until the list has rendered rows at the new position.
+    """
+    pacing = pacing or Pacing.from_env()
+    target_el = None
+    if offset is not None and container.handle:
+        try:
+            await container.scroll_to(offset - 200)
+            await container.wait_for_rows(pacing.settle_timeout)
+            target_el = await find_thread_element(page, fingerprint)
+        except Exception as e:
+            print(f"    Position jump failed: {e}")
     
-    if os.path.exists(manifest_path):
+    # Otherwise re-scroll until found (since it's a virtualized list)
+    max_re_scrolls = 0 if target_el else 20
+    for rs in range(max_re_scrolls):
         try:
-            with open(manifest_path, 'r', encoding='utf-8') as f:
-                manifest = json.load(f)
-        except:
-            pass
+            target_el = await find_thread_element(page, fingerprint)
+            if target_el: break
             
-    # Update or add entry
-    entry = {
-        "id": url_id,
-        "url": url,
-        "title": title,
-        "scrape_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "comment_count": count
-    }
+            # If not found, scroll down
+            started = time.time()
+            if await container.scroll_by(500) is None:
+                await page.mouse.wheel(0, 500)
+                await pacing.pause(started, pacing.scroll_floor)
+            else:
+                await container.wait_for_rows(pacing.settle_timeout)
+        except Exception as e:
+            print(f"    Error during re-scroll {rs}: {e}")
+            break
     
-    # Remove existing entry for this ID if it exists
-    manifest = [item for item in manifest if item["id"] != url_id]
-    manifest.insert(0, entry) # Most recent first
+    if not target_el:
+        print(f"    [-] Could not find in DOM after {max_re_scrolls} scrolls.")
+        return None
     
-    with open(manifest_path, 'w', encoding='utf-8') as f:
-        json.dump(manifest, f, ensure_ascii=False, indent=2)
-    print(f"Updated manifest: {manifest_path}")
-
-def scrape_douyin_comments(url):
-    print(f"Starting scrape_douyin_comments for {url}...")
-    # Extract unique ID from URL for directory name
-    parsed_url = urlparse(url)
-    url_path = parsed_url.path.strip('/')
-    url_id = url_path.split('/')[-1] if url_path else "default"
+    try:
+        # Returns once the element is visible and stable
+        await target_el.scroll_into_view_if_needed(timeout=5000)
+    except Exception as e:
+        print(f"    [-] Scroll failed: {e}. Moving to next thread.")
+        return None
+    return target_el
+
+def douyin_launch_options(user_data_dir, remote_debugging_port=None):
+    """launch_persistent_context() keyword arguments for the Douyin profile."""
+    print(f"Launching browser with user data dir: {user_data_dir}")
+    is_headless = os.getenv("HEADLESS", "true").lower() == "true"
+    print(f"Headless mode: {is_headless}")
     
-    # Define base and specific directories
+    args = ["--start-maximized", "--no-sandbox", "--disable-setuid-sandbox"]
+    if remote_debugging_port:
+        # Lets other Playwright instances (e.g. batch workers) attach over CDP
+        args.append(f"--remote-debugging-port={remote_debugging_port}")
+    
+    return dict(
+        user_data_dir=user_data_dir,
+        headless=is_headless,
+        channel=os.getenv("BROWSER_CHANNEL", "chrome") or None,
+        args=args,
+        user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        no_viewport=True
+    )
+
+def launch_douyin_context(p, user_data_dir, remote_debugging_port=None):
+    """Launches Chrome with the persistent Douyin profile (keeps the login state). Await the result."""
+    return p.chromium.launch_persistent_context(**douyin_launch_options(user_data_dir, remote_debugging_port))
+
+async def scrape_douyin_comments_async(url, capture=None, inline_budget=None, context=None, resource_profile=None,
+                                      incremental=None, reply_tabs=None, on_event=None, verify_login=None):
+    """Scrapes all comments and replies of a Douyin video.
+
+    capture selects how comments are read: "dom" parses the rendered comment
+    panel, "network" parses the comment/reply list API responses the page
+    fetches while scrolling. Defaults to the CAPTURE_MODE env var, then "dom".
+
+    inline_budget is the number of on-screen threads (largest reply count first)
+    expanded per scroll during Phase 1 in DOM mode; 0 defers all expansion to
+    Phase 2. Defaults to the INLINE_EXPAND_BUDGET env var, then 3.
+
+    context, if given, is an already-running async browser context to scrape in
+    (in a new tab, left open for the caller). Otherwise the scrape attaches to a
+    running browser_service for the douyin profile, or launches the persistent
+    profile and closes it around this one scrape.
+
+    resource_profile names a resource_blocking profile ("full", "comments-only",
+    "api-only") that aborts requests the scrape does not need. Defaults to the
+    RESOURCE_PROFILE env var, then "full".
+
+    incremental refreshes an already-scraped video: the list is switched to
+    newest-first, Phase 1 stops after a run of INCREMENTAL_STOP_RUN (default 20)
+    known comments, and only threads whose reply count changed are re-expanded.
+    Defaults to the INCREMENTAL env var.
+
+    reply_tabs > 1 runs Phase 2 in that many extra tabs of the video at once
+    (REPLY_TABS env, default 1), sharing a REPLY_CLICK_RATE clicks/sec budget.
+
+    on_event, if given, is called with an event dict for every new comment,
+    stored reply list, progress step and captcha pause (see scrape_events.py
+    for the event types and the iterator API built on it).
+
+    verify_login=False skips the login check (the caller already did it for
+    this context); None checks unless the browser service verified it recently.
+
+    Per-phase timings and counters are written to metrics.json in the video's
+    directory (and to METRICS_PROM_FILE in Prometheus format, if set).
+    """
+    capture = (capture or os.getenv("CAPTURE_MODE", "dom")).lower()
+    pacing = Pacing.from_env()
+    blocker = ResourceBlocker(resource_profile or os.getenv("RESOURCE_PROFILE", "full"))
+    if inline_budget is None:
+        inline_budget = int(os.getenv("INLINE_EXPAND_BUDGET", "3"))
+    if capture != "dom":
+        inline_budget = 0
+    if incremental is None:
+        incremental = os.getenv("INCREMENTAL", "").lower() in ("1", "true", "yes")
+    incremental_stop_run = int(os.getenv("INCREMENTAL_STOP_RUN", "20"))
+    if reply_tabs is None:
+        reply_tabs = int(os.getenv("REPLY_TABS", "1"))
+    print(f"Starting scrape_douyin_comments for {url} (capture: {capture})...")
     base_data_dir = os.path.join(os.getcwd(), "scraped_data")
+    catalog = await asyncio.to_thread(ScrapeCatalog, base_data_dir)
+    # Canonical aweme id for the directory name, so short and long links share one
+    url_id = await asyncio.to_thread(resolve_video_id, url, catalog)
+    print(f"Video id: {url_id}")
+    
+    def emit(event_type, **fields):
+        if on_event:
+            fields.update(type=event_type, video_id=url_id)
+            on_event(fields)
+    
+    # Define base and specific directories
     target_dir = os.path.join(base_data_dir, url_id)
     image_dir = os.path.join(target_dir, "images")
     user_data_dir = os.path.join(os.getcwd(), "douyin_user_data")
@@ -250,45 +929,75 @@ def scrape_douyin_comments(url):
         os.makedirs(image_dir)
         print(f"Created directory: {image_dir}")
     
-    p = sync_playwright().start()
+    run_id = await asyncio.to_thread(catalog.start_run, url_id, url, capture)
+    run_started = time.time()
+    metrics = ScrapeMetrics(url_id)
+    run_status = "failed"
+    
+    owns_context = False
+    attached_to_service = False
+    p = await async_playwright().start() if context is None else None
     try:
-        # Use persistent context to save login state
-        print(f"Launching browser with user data dir: {user_data_dir}")
-        is_headless = os.getenv("HEADLESS", "true").lower() == "true"
-        print(f"Headless mode: {is_headless}")
-        
-        context = p.chromium.launch_persistent_context(
-            user_data_dir=user_data_dir,
-            headless=is_headless,
-            channel="chrome", 
-            args=["--start-maximized", "--no-sandbox", "--disable-setuid-sandbox"],
-            user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            no_viewport=True
-        )
-        
-        page = context.pages[0] if context.pages else context.new_page()
+        with metrics.timer("session"):
+            if context is None:
+                # Warm browser service if one is running, else a private persistent context (saves login state)
+                context, page, owns_context = await open_session_async(
+                    p, "douyin", lambda p: launch_douyin_context(p, user_data_dir))
+                attached_to_service = not owns_context
+            else:
+                page = await context.new_page()
+        if owns_context:
+            await blocker.install(context)
+        else:
+            # Shared context: only route this scrape's own tab
+            await blocker.install(page)
         
         # Approximate maximization on Mac by matching available screen size
         try:
-            screen_size = page.evaluate("() => ({ width: window.screen.availWidth, height: window.screen.availHeight })")
+            screen_size = await page.evaluate("() => ({ width: window.screen.availWidth, height: window.screen.availHeight })")
             if screen_size['width'] > 0 and screen_size['height'] > 0:
                 print(f"Detected screen size: {screen_size['width']}x{screen_size['height']}")
-                page.set_viewport_size(screen_size)
+                await page.set_viewport_size(screen_size)
         except Exception as e:
             print(f"Viewport adjustment warning: {e}")
 
+        # Captcha watcher: pushes overlay changes instead of being polled every scroll
+        verification = VerificationWatcher(
+            on_pause=lambda paused, seconds: emit("captcha", state="paused" if paused else "resumed", seconds=round(seconds, 1))
+        )
+        await verification.install(page)
+
+        # Network capture must be listening before the first comment page loads
+        collector = None
+        if capture == "network":
+            collector = CommentResponseCollector(
+                image_fetcher=lambda src: _download_comment_image(src, image_dir),
+                record_dir=os.getenv("RECORD_API_DIR") or None
+            )
+            collector.attach(page)
+
         print(f"Navigating to {url}...")
-        try:
-            page.goto(url, timeout=60000)
-            page.wait_for_load_state("domcontentloaded")
-        except Exception as e:
-            print(f"Navigation warning: {e}")
+        with metrics.timer("navigation"):
+            try:
+                await page.goto(url, timeout=60000)
+                await page.wait_for_load_state("domcontentloaded")
+            except Exception as e:
+                print(f"Navigation warning: {e}")
+        landed_id = await asyncio.to_thread(remember_final_url, url, page.url, catalog)
+        if landed_id and landed_id != url_id:
+            print(f"Note: {url} resolves to video {landed_id}; later runs will use that id.")
 
         # Strict Login Verification
-        verify_login_status(page)
+        with metrics.timer("login_verification"):
+            if verify_login is False:
+                pass
+            elif attached_to_service and await asyncio.to_thread(login_recently_verified, "douyin"):
+                print(">> Login already verified by the browser service.")
+            else:
+                await verify_login_status_async(page)
 
         # Get Page Title for Manifest
-        page_title = page.title()
+        page_title = await page.title()
         # Clean up Douyin title suffix if present
         if " - 抖音" in page_title:
             page_title = page_title.split(" - 抖音")[0]
@@ -297,9 +1006,8 @@ def scrape_douyin_comments(url):
         # Try to extract total comment count from header for progress tracking
         expected_total = 0
         try:
-            tab_text = page.query_selector('[data-e2e="comment-switch-tab"], .comment-tab-text').inner_text()
+            tab_text = await (await page.query_selector('[data-e2e="comment-switch-tab"], .comment-tab-text')).inner_text()
             # Extract number from "评论(1190)" or similar
-            import re
             match = re.search(r'\((\d+)\)', tab_text) or re.search(r'(\d+)', tab_text)
             if match:
                 expected_total = int(match.group(1))
@@ -307,195 +1015,198 @@ def scrape_douyin_comments(url):
         except:
             pass
 
-        # Force open comments if hidden
-        print("Checking comment sidebar visibility...")
-        
-        # 1. Close any blocking modals first
-        blocking_selectors = [
-            '.login-mask', 
-            '#login-full-panel', 
-            '[data-e2e="login-close"]', 
-            '.trust-login-dialog-mask',
-            '.vc-mask'
-        ]
-        
-        for _ in range(5): # Quick initial checks
-            for selector in blocking_selectors:
-                try:
-                    modal = page.query_selector(selector)
-                    if modal and modal.is_visible():
-                        print(f"!!! BLOCKING MODAL DETECTED: {selector} !!!")
-                        # Try to find a close button within or use escape key
-                        close_btn = modal.query_selector('[class*="close"], [class*="Close"]')
-                        if close_btn:
-                            print("Attempting to click close button...")
-                            close_btn.click()
-                        else:
-                            print("No clear close button. Pressing Escape...")
-                            page.keyboard.press("Escape")
-                        time.sleep(2)
-                except: pass
-
-        # 2. Attempt to click comment tab
-        try:
-            # We look for the tab multiple times
-            for attempt in range(5):
-                if page.is_visible('.comment-mainContent'):
-                    print("Comments section is already visible.")
-                    break
-                    
-                comment_tab = page.query_selector('[data-e2e="comment-switch-tab"]') or page.query_selector(r'text=/评论\(\d+\)/') 
-                if comment_tab:
-                    print(f"Attempt {attempt+1}: Clicking comment tab...")
-                    # Use force=True because sometimes Douyin has invisible overlays even after modals are "gone"
-                    comment_tab.click(force=True, timeout=5000)
-                    time.sleep(3)
-                    if page.is_visible('.comment-mainContent'):
-                        print(">> SUCCESS: Comments tab opened.")
-                        break
-                else:
-                    print(f"Attempt {attempt+1}: Comment tab not found in DOM yet. Waiting...")
-                    time.sleep(2)
-        except Exception as e:
-            print(f"Tab click warning: {e}")
-            print("Tip: If a login modal is still blocking, please resolve it manually.")
-                
-        # Find the specific scrollable container
+        with metrics.timer("comment_tab"):
+            await open_comment_panel(page, pacing)
         print("Locating scrollable comment container...")
+        container_started = time.perf_counter()
+        container = ScrollContainer(page)
+        if await container.resolve():
+            print(f"Selected comment container (scrollHeight {await container.scroll_by(0)})")
+        else:
+            print("No visible comment container found; falling back to mouse-wheel scrolling.")
+        metrics.observe("container_discovery", time.perf_counter() - container_started)
 
+        # Load existing data if resuming (comments.json + any un-compacted log)
+        store = CommentStore(target_dir)
+        comments_data = await asyncio.to_thread(store.load)
+        resumed_count = len(comments_data)
+        seen_keys_path = os.path.join(target_dir, "seen_keys.bin")
+        seen_ids = (await asyncio.to_thread(SeenSet.load, seen_keys_path, len(comments_data))
+                    or await asyncio.to_thread(SeenSet.from_records, comments_data))
+        if collector:
+            for c in comments_data:
+                collector.register(c)
+        if comments_data:
+            print(f"Resuming with {len(comments_data)} existing comments.")
 
-        
-        # Find the specific scrollable container
-        print("Locating scrollable comment container...")
-        time.sleep(3) # Give it moments to settle
-        scroll_container = None
-        
-        # Strategy: Analyze all candidates
-        try:
-            potential_containers = page.query_selector_all('.comment-mainContent')
-            candidates = []
-            for i, c in enumerate(potential_containers):
-                # Log all
-                h = c.evaluate("el => el.scrollHeight")
-                vis = c.is_visible()
-                attr = c.get_attribute("scrollable")
-                print(f"Container {i}: visible={vis}, height={h}, scrollable={attr}")
-                
-                if vis:
-                     candidates.append((i, c, h, attr))
-            
-            # Priority 1: scrollable="true"
-            for _, c, h, attr in candidates:
-                if attr == "true":
-                    scroll_container = c
-                    print(f"Selected container with scrollable='true' (height {h})")
-                    break
-            
-            # Priority 2: Largest height if no scrollable attr
-            if not scroll_container and candidates:
-                # Sort by height desc
-                candidates.sort(key=lambda x: x[2], reverse=True)
-                scroll_container = candidates[0][1]
-                print(f"Selected container with max height {candidates[0][2]}")
-                
-        except Exception as e:
-            print(f"Container finding error: {e}")
-            
-        def find_container(page):
-            try:
-                # Target the sidebar comment container specifically
-                potential_containers = page.query_selector_all('.comment-mainContent, [data-e2e="comment-list"], .comment-list-container')
-                vis_containers = []
-                for c in potential_containers:
-                    try:
-                        if c.is_visible():
-                            rect = c.bounding_box()
-                            if rect and rect['width'] > 100 and rect['height'] > 100:
-                                vis_containers.append((c, rect['height'], c.evaluate("el => el.scrollHeight")))
-                    except: continue
-                
-                if vis_containers:
-                    # Prefer the one with the largest scrollHeight
-                    vis_containers.sort(key=lambda x: x[2], reverse=True)
-                    winner = vis_containers[0]
-                    print(f"  [DEBUG] Container Match: H={winner[1]}, ScrollH={winner[2]}")
-                    return winner[0]
-                else:
-                    print("  [DEBUG] No visible comment container found matching criteria.")
-            except Exception as e: 
-                print(f"  [DEBUG] find_container error: {e}")
-            return None
-
-        def wait_for_loading_to_clear(page, timeout=10):
-            """Wait for '加载中' or loading spinners to disappear."""
-            start_time = time.time()
-            # print(f"  [DEBUG] Waiting for loading to clear...")
-            while time.time() - start_time < timeout:
-                try:
-                    # Check for common loading text or elements
-                    loading = page.query_selector('div:has-text("加载中"), div:has-text("努力加载中"), .loading-icon')
-                    if not loading or not loading.is_visible():
-                        # Also check if the container scroll height stopped changing? Overkill for now.
-                        return True
-                    # print(f"  [DEBUG] Still loading... ({(time.time() - start_time):.1f}s)")
-                    time.sleep(1.0)
-                except:
-                    return True
-            return False
+        # Thread lookup by fingerprint, and scroll offset at first sighting so
+        # Phase 2 can jump straight back to a thread instead of searching
+        thread_index = {content_fingerprint(c): i for i, c in enumerate(comments_data)}
+        positions = {}
 
-        # Load existing data if resuming
-        result_file = os.path.join(target_dir, 'comments.json')
-        comments_data = []
-        seen_ids = set()
-        if os.path.exists(result_file):
-            try:
-                with open(result_file, 'r', encoding='utf-8') as f:
-                    comments_data = json.load(f)
-                    for c in comments_data:
-                        uid = f"{c['user']}_{c['content'][:20]}_{c['time']}"
-                        seen_ids.add(uid)
-                print(f"Resuming with {len(comments_data)} existing comments.")
-            except: pass
+        api_replies = {}
+        async def pull_api_responses():
+            # Parse what the comment API delivered, then log the reply lists it filled in
+            # (collected by log_api_replies during parsing) in one write
+            fresh = await collector.process_pending()
+            if api_replies:
+                updates = [(index, {"replies": record["replies"], "replies_scraped": record.get("replies_scraped", False)})
+                           for index, record in api_replies.items()]
+                api_replies.clear()
+                with metrics.timer("file_write"):
+                    await asyncio.to_thread(store.update_many, updates)
+            return fresh
+
+        if collector:
+            def log_api_replies(record):
+                # Replies filled in from reply list responses go through the log like DOM ones.
+                # Threads not stored yet are appended with their replies moments later.
+                index = thread_index.get(content_fingerprint(record))
+                if index is not None:
+                    api_replies[index] = record
+            collector.on_replies = log_api_replies
+
+        # Incremental refresh needs newest-first order to stop at known comments
+        if incremental:
+            if not comments_data:
+                print("Incremental mode: no previous scrape found, doing a full scrape.")
+                incremental = False
+            elif not await switch_to_newest_first(page, pacing):
+                print("Incremental mode: could not switch to newest-first; doing a full pass instead.")
+                incremental = False
+            else:
+                print(f"Incremental mode: stopping after {incremental_stop_run} consecutive known comments.")
+        known_streak = 0
+        streak_counted = set()  # fingerprints already counted toward known_streak this run
+
+        # Checkpoint from an interrupted run: seek past what it already covered
+        checkpoint = ScrapeCheckpoint(target_dir, interval=float(os.getenv("CHECKPOINT_INTERVAL", "5")))
+        resume = await asyncio.to_thread(checkpoint.load, len(comments_data))
+        if resume and resume.get("incremental", False) != incremental:
+            print("Checkpoint was taken in a different list order; starting from the top.")
+            resume = None
+            checkpoint = ScrapeCheckpoint(target_dir, checkpoint.interval)
+        checkpoint.update(incremental=incremental)
+        phase1_done = bool(resume and resume["phase"] == "replies")
+        if phase1_done:
+            print("Checkpoint: Phase 1 already completed by the previous run, skipping it.")
+        elif resume and resume.get("scroll_top"):
+            print(f"Checkpoint: seeking to scroll offset {resume['scroll_top']}...")
+            with metrics.timer("checkpoint_seek"):
+                reached = await seek_scroll_offset(container, resume["scroll_top"], pacing)
+            last_fp = resume.get("last_fingerprint")
+            found = last_fp is not None and await find_thread_element(page, last_fp) is not None
+            print(f"  Reached offset {reached}" + (" (last-seen comment is on screen)." if found else "."))
+
+        async def save_checkpoint():
+            # The checkpoint must never run ahead of what the store has on disk
+            def write():
+                store.sync()
+                checkpoint.save(force=True)
+            await asyncio.to_thread(write)
 
         # --- Phase 1: Rapid Top-Level Comment Collection ---
         print("\n--- PHASE 1: Collecting Top-Level Comments ---")
         no_new_data_count = 0
         max_no_new_data = 15
         total_scrolls = 0
+        inline_expanded = 0
         
-        while True:
+        while not phase1_done:
             total_scrolls += 1
-            check_for_verification(page)
+            metrics.incr("scrolls")
+            await check_for_verification_async(page, verification)
             
-            # Find main comments in current view
-            all_items = page.query_selector_all('[data-e2e="comment-item"]')
-            new_in_this_scroll = 0
+            # Extract all main comments in current view (one round-trip),
+            # or take whatever the comment list API delivered since last scroll
             seen_in_this_scroll = 0
             
-            for item in all_items:
+            with metrics.timer("extraction"):
+                if collector:
+                    candidates = [(c, {}) for c in await pull_api_responses()]
+                else:
+                    candidates = await extract_visible_comments(page, image_dir, with_raw=True)
+            updates = []
+            if collector:
+                known_streak = collector.known_streak
+                for cid, new_count in collector.reply_count_changes:
+                    index = thread_index.get(content_fingerprint(collector.threads[cid]))
+                    if incremental and index is not None:
+                        updates.append((index, {"reply_count": new_count, "replies_scraped": False}))
+                collector.reply_count_changes = []
+            
+            fresh = []
+            fingerprints = []
+            for c_data, raw in candidates:
+                fp = content_fingerprint(c_data)
+                fingerprints.append(fp)
+                last_fp = fp
+                if raw.get("offset") is not None:
+                    positions.setdefault(fp, raw["offset"])
+                if seen_ids.add_record(c_data):
+                    if inline_budget and not raw.get("has_expander"):
+                        # No expansion control of any kind: there is nothing to expand later
+                        c_data["replies_scraped"] = True
+                    fresh.append((fp, c_data))
+                    known_streak = 0
+                else:
+                    seen_in_this_scroll += 1
+                    # Only comments from the previous scrape count, each once: items appended
+                    # earlier in this run stay on screen after a scroll that loaded nothing
+                    known_index = thread_index.get(fp)
+                    if (not collector and known_index is not None and known_index < resumed_count
+                            and fp not in streak_counted):
+                        streak_counted.add(fp)
+                        known_streak += 1
+                    if incremental and known_index is not None and raw.get("reply_count"):
+                        # Known thread whose "展开N条回复" count moved: re-check its replies
+                        known = comments_data[known_index]
+                        if raw["reply_count"] != known.get("reply_count", len(known.get("replies", []))):
+                            updates.append((known_index, {"reply_count": raw["reply_count"], "replies_scraped": False}))
+            if updates:
+                with metrics.timer("file_write"):
+                    await asyncio.to_thread(store.update_many, updates)
+            new_in_this_scroll = len(fresh)
+            if fresh:
+                # One log write per scroll for everything it turned up
+                with metrics.timer("file_write"):
+                    first = await asyncio.to_thread(store.append_many, [c for _, c in fresh])
+                for offset, (fp, c_data) in enumerate(fresh):
+                    thread_index[fp] = first + offset
+                    emit("comment", index=first + offset, comment=c_data)
+            
+            expandable = []
+            for (c_data, raw), fp in zip(candidates, fingerprints):
+                index = thread_index.get(fp)
+                if inline_budget and raw.get("tag") and index is not None and not comments_data[index].get("replies_scraped"):
+                    expandable.append((comments_data[index].get("reply_count") or 0, index, raw["tag"]))
+            
+            # Expand the hottest threads while they are on screen
+            expandable.sort(reverse=True)
+            for reply_count, index, tag in expandable[:inline_budget]:
                 try:
-                    # Check if it's a main comment
-                    is_reply = item.evaluate("el => !!el.closest('.replyContainer')")
-                    if is_reply: continue
-                    
-                    c_data = self_extract_comment(item, image_dir)
-                    if not c_data: continue
-                    
-                    uid = f"{c_data['user']}_{c_data['content'][:20]}_{c_data['time']}"
-                    if uid not in seen_ids:
-                        seen_ids.add(uid)
-                        comments_data.append(c_data)
-                        new_in_this_scroll += 1
-                    else:
-                        seen_in_this_scroll += 1
-                except: continue
+                    target_el = await page.query_selector(f'[data-scrape-tag="{tag}"]')
+                    if not target_el: continue
+                    await target_el.scroll_into_view_if_needed(timeout=5000)
+                    with metrics.timer("expansion"):
+                        await expand_replies(target_el, pacing, reply_count)
+                    with metrics.timer("extraction"):
+                        replies = await extract_thread_replies(target_el, image_dir)
+                    with metrics.timer("file_write"):
+                        await asyncio.to_thread(store.update, index, replies=replies, replies_scraped=True)
+                    emit("replies", index=index, replies=replies)
+                    inline_expanded += 1
+                    print(f"    Inline: expanded {len(replies)}/{reply_count} replies for {comments_data[index]['user']}")
+                except Exception as e:
+                    print(f"    Inline expansion failed: {e}")
             
+            metrics.incr("new_comments", new_in_this_scroll)
+            metrics.incr("duplicate_comments", seen_in_this_scroll)
+            emit("progress", phase="collect", scroll=total_scrolls, comments=len(comments_data),
+                 new=new_in_this_scroll, expected=expected_total)
             if new_in_this_scroll > 0:
                 print(f"  Scroll #{total_scrolls}: Found {new_in_this_scroll} new comments. (Total: {len(comments_data)})")
                 no_new_data_count = 0
-                # Intermediate save
-                with open(result_file, 'w', encoding='utf-8') as f:
-                    json.dump(comments_data, f, ensure_ascii=False, indent=2)
             else:
                 no_new_data_count += 1
                 if seen_in_this_scroll > 0:
@@ -506,149 +1217,176 @@ def scrape_douyin_comments(url):
             if no_new_data_count >= max_no_new_data:
                 print("Phase 1 Complete: No more new top-level comments found.")
                 break
+            if incremental and known_streak >= incremental_stop_run:
+                print(f"Phase 1 Complete: Reached {known_streak} consecutive known comments.")
+                break
+            if collector and collector.exhausted and new_in_this_scroll == 0:
+                print("Phase 1 Complete: Comment list API reports no more pages.")
+                break
 
-            # Scroll down
-            scroll_container = find_container(page)
-            if scroll_container:
-                scroll_container.evaluate("el => el.scrollTop = el.scrollHeight")
+            # Scroll down, then wait only until the list reacts (new items / loading done)
+            scroll_target = await container.element()
+            if scroll_target:
+                scroll = container.scroll_to_bottom
             else:
-                page.mouse.wheel(0, 3000)
-            
-            wait_for_loading_to_clear(page)
-            time.sleep(random.uniform(1.0, 2.0))
+                async def scroll():
+                    await page.mouse.wheel(0, 3000)
+            with metrics.timer("scroll"):
+                await act_and_wait(scroll_target or page, scroll, pacing.scroll_timeout, pacing.scroll_floor, pacing)
+            if candidates:
+                checkpoint.update(scroll_top=container.scroll_top, last_fingerprint=last_fp, comments=len(comments_data))
+                if checkpoint.due():
+                    await save_checkpoint()
+        
+        checkpoint.update(phase="replies", comments=len(comments_data))
+        await save_checkpoint()
 
         # --- Phase 2: Targeted Reply Expansion ---
         print("\n--- PHASE 2: Expanding Replies ---")
         
         # Scroll back to top to begin systematic expansion
-        scroll_container = find_container(page)
-        if scroll_container:
+        if await container.scroll_to(0) is not None:
             print("Scrolling back to top for Phase 2...")
-            scroll_container.evaluate("el => el.scrollTop = 0")
-            time.sleep(2)
+            await container.wait_for_rows(pacing.settle_timeout)
+
+        if collector:
+            await pull_api_responses()
+            pending_threads = sum(1 for c in comments_data if not c.get("replies_scraped"))
+            print(f"Threads fully delivered by the API: {len(comments_data) - pending_threads}. Remaining: {pending_threads}")
 
-        for i, comment in enumerate(comments_data):
+        if inline_budget:
+            pending_threads = sum(1 for c in comments_data if not c.get("replies_scraped"))
+            print(f"Threads expanded inline during Phase 1: {inline_expanded}. Remaining: {pending_threads}")
+
+        budget = ClickBudget.from_env()
+        # Resume the thread queue where the last run stopped; its failures go last
+        failed = set(checkpoint.state["failed"])
+        start = checkpoint.state["phase2_position"]
+        queue_order = [i for i in list(range(start, len(comments_data))) + list(range(start)) if i not in failed]
+        queue_order += sorted(failed)
+        failed = set()
+        pending = [(content_fingerprint(c), c.get("reply_count"), positions.get(content_fingerprint(c)))
+                   for c in comments_data if not c.get("replies_scraped")]
+        if reply_tabs > 1 and len(pending) > 1:
+            async def merge_replies(fp, replies):
+                # Merge by comment identity; tabs report in their own order
+                index = thread_index.get(fp)
+                if index is None:
+                    return
+                if replies is None:
+                    metrics.incr("failed_thread_lookups")
+                    failed.add(index)
+                    return
+                with metrics.timer("file_write"):
+                    await asyncio.to_thread(store.update, index, replies=replies, replies_scraped=True)
+                emit("replies", index=index, replies=replies)
+                metrics.incr("threads_expanded")
+            
+            with metrics.timer("reply_harvest"):
+                await harvest_replies(context, url, pending, reply_tabs, image_dir, merge_replies,
+                                      budget=budget, resource_profile=blocker.profile_name)
+        
+        for i in queue_order:
+            comment = comments_data[i]
             if comment.get("replies_scraped"):
                 continue
+            checkpoint.update(phase2_position=i, failed=sorted(failed))
+            if checkpoint.due():
+                await save_checkpoint()
             
+            await check_for_verification_async(page, verification)
             print(f"  [{i+1}/{len(comments_data)}] Searching for: {comment['user']} - {comment['content'][:30]}...")
             
             # Find the comment element in the DOM
-            target_uid = f"{comment['user']}_{comment['content'][:20]}_{comment['time']}"
-            target_el = None
-            
-            # Re-scroll until found (since it's a virtualized list)
-            max_re_scrolls = 20 # Reduced for debugging
-            for rs in range(max_re_scrolls):
-                try:
-                    all_items = page.query_selector_all('[data-e2e="comment-item"]')
-                    # print(f"    Scroll {rs}: {len(all_items)} items in DOM.")
-                    for item in all_items:
-                        try:
-                            # Extract quick fingerprint
-                            user_el = item.query_selector('._uYOTNYZ')
-                            content_el = item.query_selector('.C7LroK_h')
-                            if not user_el or not content_el: continue
-                            
-                            u_text = user_el.inner_text().strip()
-                            if "\n作者" in u_text: u_text = u_text.replace("\n作者", "").strip() + " [Author]"
-                            
-                            # Match UID
-                            if u_text == comment['user'] and comment['content'][:20] in content_el.inner_text():
-                                target_el = item
-                                break
-                        except: continue
-                    
-                    if target_el: break
-                    
-                    # If not found, scroll down
-                    if scroll_container:
-                        scroll_container.evaluate("el => el.scrollTop += 500")
-                    else:
-                        page.mouse.wheel(0, 500)
-                    time.sleep(0.3)
-                except Exception as e:
-                    print(f"    Error during re-scroll {rs}: {e}")
-                    break
-            
+            fp = content_fingerprint(comment)
+            with metrics.timer("thread_lookup"):
+                target_el = await locate_thread(page, container, fp, positions.get(fp), pacing)
             if not target_el:
-                print(f"    [-] Could not find in DOM after {max_re_scrolls} scrolls. (User: {comment['user']})")
-                continue
-            
-            try:
-                print(f"    [+] Found. Scrolling...")
-                target_el.scroll_into_view_if_needed(timeout=5000)
-                time.sleep(1)
-            except Exception as e:
-                print(f"    [-] Scroll failed: {e}. Moving to next thread.")
+                metrics.incr("failed_thread_lookups")
+                failed.add(i)
                 continue
             
-            # Robust Expansion Loop (inspired by debug_replies.py)
-            expansion_passes = 0
-            max_expansion_passes = 15
-            any_expanded = False
-            
-            while expansion_passes < max_expansion_passes:
-                clicked_any = False
-                btns = target_el.query_selector_all('button, [role="button"], span, p')
-                
-                for btn in btns:
-                    try:
-                        if not btn.is_visible(): continue
-                        text = btn.inner_text().strip()
-                        if not text: continue
-                        
-                        is_expansion = False
-                        if ("展开" in text or "更多" in text or "条回复" in text or "查看" in text) and "收起" not in text:
-                            if any(x in text for x in ["回复", "分享", "赞"]):
-                                import re
-                                if re.search(r'展开\d+条回复|展开更多|更多回复', text):
-                                    is_expansion = True
-                                else: continue
-                            else: is_expansion = True
-                        
-                        if is_expansion:
-                            # print(f"      Clicking: {text}")
-                            btn.click()
-                            clicked_any = True
-                            any_expanded = True
-                            time.sleep(random.uniform(2.0, 3.5))
-                            break # Re-scan DOM
-                    except: continue
-                
-                if not clicked_any: break
-                expansion_passes += 1
+            with metrics.timer("expansion"):
+                await expand_replies(target_el, pacing, comment.get("reply_count"), budget)
             
-            # Extract replies
-            replies = []
-            reply_container = target_el.query_selector('.replyContainer')
-            if reply_container:
-                reply_items = reply_container.query_selector_all('[data-e2e="comment-item"]')
-                for r_item in reply_items:
-                    r_data = self_extract_comment(r_item, image_dir)
-                    if r_data:
-                        replies.append(r_data)
+            # Extract replies (prefer the reply list API payloads the clicks triggered)
+            with metrics.timer("extraction"):
+                if collector:
+                    await pull_api_responses()
+                replies = []
+                if collector and comment.get("replies"):
+                    replies = comment["replies"]
+                else:
+                    replies = await extract_thread_replies(target_el, image_dir)
             
-            comment["replies"] = replies
-            comment["replies_scraped"] = True
+            # Log progress after EACH thread for maximum stability (append-only)
+            with metrics.timer("file_write"):
+                await asyncio.to_thread(store.update, i, replies=replies, replies_scraped=True)
+            emit("replies", index=i, replies=replies)
+            emit("progress", phase="replies", thread=i + 1, comments=len(comments_data))
+            metrics.incr("threads_expanded")
             print(f"    Found {len(replies)} replies.")
-            
-            # Save progress after EACH thread for maximum stability
-            with open(result_file, 'w', encoding='utf-8') as f:
-                json.dump(comments_data, f, ensure_ascii=False, indent=2)
+
+        # Barrier: all images must be on disk before results are published
+        with metrics.timer("image_download"):
+            await asyncio.to_thread(get_image_downloader().wait, image_dir)
+        await asyncio.to_thread(_prune_missing_images, comments_data, target_dir)
+        with metrics.timer("file_write"):
+            await asyncio.to_thread(store.compact)
+            await asyncio.to_thread(seen_ids.save, seen_keys_path, len(comments_data))
+        await asyncio.to_thread(checkpoint.clear)
+        metrics.incr("inline_expanded", inline_expanded)
+        metrics.incr("container_resolves", container.resolves)
+        metrics.incr("captcha_waits", verification.pauses)
+        if verification.paused_seconds:
+            metrics.observe("captcha_wait", verification.paused_seconds)
 
         print(f"\nScraping Complete. Final count: {len(comments_data)} threads.")
-        update_manifest(base_data_dir, url_id, url, page_title, len(comments_data))
+        if blocker.profile:
+            print(blocker.summary())
+        await asyncio.to_thread(catalog.finish_run, run_id, url_id, url, page_title, comments_data, {
+            "duration": round(time.time() - run_started, 1),
+            "new_comments": len(comments_data) - resumed_count,
+            "captcha_pauses": verification.pauses,
+            "captcha_seconds": round(verification.paused_seconds, 1),
+            "blocked_requests": blocker.blocked,
+        })
+        print(f"Updated catalog and manifest: {base_data_dir}")
+        run_status = "ok"
+        metrics.print_report()
+        emit("done", comments=len(comments_data))
+        return comments_data
     
+    except BaseException as e:
+        await asyncio.to_thread(catalog.fail_run, run_id, e)
+        raise
     finally:
+        try:
+            await asyncio.to_thread(metrics.write_json, os.path.join(target_dir, "metrics.json"), run_status)
+            await asyncio.to_thread(record_run, metrics, run_status)
+        except Exception as e:
+            print(f"Metrics export error: {e}")
         # Critical: Close context to ensure cookies/local storage are saved to the persistent dir
         try:
-            if 'context' in locals():
-                context.close()
+            if 'store' in locals():
+                await asyncio.to_thread(store.close)
+            if owns_context:
+                await context.close()
                 print("Browser context closed and session saved.")
-            p.stop()
+            elif 'page' in locals():
+                await page.close()
+            if p:
+                await p.stop()
         except Exception as e:
             print(f"Cleanup error: {e}")
+        await asyncio.to_thread(catalog.close)
+
+def scrape_douyin_comments(url, capture=None, inline_budget=None, resource_profile=None,
+                           incremental=None, reply_tabs=None, on_event=None):
+    """Blocking wrapper around scrape_douyin_comments_async (same arguments, own browser session)."""
+    return asyncio.run(scrape_douyin_comments_async(
+        url, capture=capture, inline_budget=inline_budget, resource_profile=resource_profile,
+        incremental=incremental, reply_tabs=reply_tabs, on_event=on_event))
 
 if __name__ == "__main__":
     target_url = "https://v.douyin.com/sUt6tM1Aaic/"
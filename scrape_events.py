@@ -0,0 +1,122 @@
+import asyncio
+import json
+import queue
+import sys
+import threading
+
+# Streaming API over scrape_douyin_comments. The scrape runs in its own thread
+# (with its own Playwright instance) and publishes events as it goes; any number
+# of consumers can iterate them concurrently, sync or async:
+#
+#   for event in stream_douyin_comments(url):
+#       if event["type"] == "comment": ...
+#
+#   stream = ScrapeStream(url)
+#   live, alerts = stream.subscribe(), stream.subscribe()
+#   stream.start()
+#
+# Event types (every event also carries "video_id"):
+#   comment   index, comment       a new top-level comment was stored
+#   replies   index, replies       a thread's replies were stored
+#   progress  phase, comments, ... periodic counters (phase "collect" or "replies")
+#   captcha   state, seconds       "paused" when an overlay appears, "resumed" after
+#   done      comments             the scrape finished and files are written
+#   error     error                the scrape raised; the stream ends after this
+#
+# comment/replies payloads are the scraper's live records; copy them if a
+# consumer keeps them around while the scrape is still running.
+
+_END = object()
+
+class Subscription:
+    """One consumer's view of a ScrapeStream. Iterate it, or use `async for`."""
+
+    def __init__(self, maxsize=0):
+        self._queue = queue.Queue(maxsize)
+
+    def _put(self, event):
+        self._queue.put(event)
+
+    def __iter__(self):
+        while True:
+            event = self._queue.get()
+            if event is _END:
+                return
+            yield event
+
+    async def __aiter__(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            event = await loop.run_in_executor(None, self._queue.get)
+            if event is _END:
+                return
+            yield event
+
+class ScrapeStream:
+    """Runs one scrape in a background thread and fans its events out to subscribers.
+
+    Subscribe before start(); events published earlier are not replayed.
+    kwargs are passed to scrape_douyin_comments, which runs its own event loop
+    in that thread.
+    """
+
+    def __init__(self, url, **kwargs):
+        self.url = url
+        self.kwargs = kwargs
+        self.error = None
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def subscribe(self, maxsize=0):
+        """maxsize > 0 makes a slow consumer hold the scrape back instead of buffering without bound."""
+        subscription = Subscription(maxsize)
+        with self._lock:
+            self._subscribers.append(subscription)
+        return subscription
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription._put(event)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def join(self, timeout=None):
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        # Imported here so this module stays importable without a browser stack
+        from scrape_douyin import scrape_douyin_comments
+        try:
+            scrape_douyin_comments(self.url, on_event=self.publish, **self.kwargs)
+        except BaseException as e:
+            self.error = e
+            self.publish({"type": "error", "error": str(e)})
+        finally:
+            self.publish(_END)
+
+def stream_douyin_comments(url, **kwargs):
+    """Yields scrape events for url as they happen (see the event list above)."""
+    stream = ScrapeStream(url, **kwargs)
+    subscription = stream.subscribe()
+    stream.start()
+    yield from subscription
+
+async def astream_douyin_comments(url, **kwargs):
+    """Async version of stream_douyin_comments."""
+    stream = ScrapeStream(url, **kwargs)
+    subscription = stream.subscribe()
+    stream.start()
+    async for event in subscription:
+        yield event
+
+if __name__ == "__main__":
+    # Usage: python scrape_events.py <video url>   (one JSON event per line, for piping into other tools)
+    for event in stream_douyin_comments(sys.argv[1]):
+        print(json.dumps(event, ensure_ascii=False), flush=True)
@@ -0,0 +1,141 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Per-run timers and counters for scrape_douyin_comments. Each run writes a JSON
+# summary next to its comments; finished runs are also folded into process-wide
+# totals that can be exported in Prometheus text format, either to a file
+# (METRICS_PROM_FILE) or over HTTP (start_metrics_server, e.g. from batch_scrape).
+
+class ScrapeMetrics:
+    """Timers (count / total / max seconds) and counters for one scrape run."""
+
+    def __init__(self, video_id):
+        self.video_id = video_id
+        self.started = time.time()
+        self.timers = {}  # name -> [count, total seconds, max seconds]
+        self.counters = {}
+
+    @contextmanager
+    def timer(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def observe(self, name, seconds):
+        stat = self.timers.setdefault(name, [0, 0.0, 0.0])
+        stat[0] += 1
+        stat[1] += seconds
+        stat[2] = max(stat[2], seconds)
+
+    def incr(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def summary(self, status="ok"):
+        return {
+            "video_id": self.video_id,
+            "status": status,
+            "started": datetime.fromtimestamp(self.started).strftime("%Y-%m-%d %H:%M:%S"),
+            "wall_seconds": round(time.time() - self.started, 3),
+            "timers": {
+                name: {"count": count, "total": round(total, 3), "max": round(peak, 3),
+                       "mean": round(total / count, 4) if count else 0}
+                for name, (count, total, peak) in sorted(self.timers.items())
+            },
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def write_json(self, path, status="ok"):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(status), f, indent=2)
+        os.replace(tmp_path, path)
+
+    def print_report(self):
+        total = time.time() - self.started
+        print(f"\nTime breakdown ({total:.1f}s wall):")
+        for name, (count, seconds, peak) in sorted(self.timers.items(), key=lambda kv: -kv[1][1]):
+            share = seconds / total * 100 if total else 0
+            print(f"  {name:<20} {seconds:8.1f}s {share:5.1f}%  n={count:<6} max={peak:.2f}s")
+        if self.counters:
+            print("  " + ", ".join(f"{k}={v}" for k, v in sorted(self.counters.items())))
+
+# Process-wide totals over finished runs, for Prometheus export
+_totals_lock = threading.Lock()
+_totals = {"runs": {}, "timers": {}, "counters": {}}
+
+def record_run(metrics, status="ok"):
+    """Folds a finished run into the process totals and refreshes METRICS_PROM_FILE if set."""
+    with _totals_lock:
+        _totals["runs"][status] = _totals["runs"].get(status, 0) + 1
+        for name, (count, seconds, _) in metrics.timers.items():
+            stat = _totals["timers"].setdefault(name, [0, 0.0])
+            stat[0] += count
+            stat[1] += seconds
+        for name, value in metrics.counters.items():
+            _totals["counters"][name] = _totals["counters"].get(name, 0) + value
+    prom_file = os.getenv("METRICS_PROM_FILE")
+    if prom_file:
+        write_prometheus(prom_file)
+
+def prometheus_text():
+    with _totals_lock:
+        lines = [
+            "# HELP douyin_scrape_runs_total Finished scrape runs by status.",
+            "# TYPE douyin_scrape_runs_total counter",
+        ]
+        lines += [f'douyin_scrape_runs_total{{status="{s}"}} {n}' for s, n in sorted(_totals["runs"].items())]
+        lines += [
+            "# HELP douyin_scrape_phase_seconds_total Seconds spent per scrape phase.",
+            "# TYPE douyin_scrape_phase_seconds_total counter",
+        ]
+        lines += [f'douyin_scrape_phase_seconds_total{{phase="{name}"}} {seconds:.3f}'
+                  for name, (_, seconds) in sorted(_totals["timers"].items())]
+        lines += [
+            "# HELP douyin_scrape_phase_calls_total Timed operations per scrape phase.",
+            "# TYPE douyin_scrape_phase_calls_total counter",
+        ]
+        lines += [f'douyin_scrape_phase_calls_total{{phase="{name}"}} {count}'
+                  for name, (count, _) in sorted(_totals["timers"].items())]
+        lines += [
+            "# HELP douyin_scrape_events_total Scrape event counters.",
+            "# TYPE douyin_scrape_events_total counter",
+        ]
+        lines += [f'douyin_scrape_events_total{{event="{name}"}} {value}'
+                  for name, value in sorted(_totals["counters"].items())]
+    return "\n".join(lines) + "\n"
+
+def write_prometheus(path):
+    """Writes the totals for a node_exporter textfile collector (atomically)."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, path)
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip('/') != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """Serves /metrics in a daemon thread. Returns the server (call shutdown() to stop)."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Metrics available at http://{host}:{server.server_address[1]}/metrics")
+    return server
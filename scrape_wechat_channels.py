@@ -8,6 +8,7 @@ import io
 import re
 from datetime import datetime
 from playwright.sync_api import sync_playwright
+from browser_service import open_session
 
 # Configuration
 WECHAT_URL = "https://channels.weixin.qq.com/platform/interaction/comment"
@@ -168,13 +169,15 @@ def scrape_comments_pure_vision(page, video_index):
 
 def run_scraper():
     with sync_playwright() as p:
-        print(f"Launching browser: {USER_DATA_DIR}")
-        browser = p.chromium.launch_persistent_context(
-            USER_DATA_DIR, 
-            headless=False, 
-            viewport={'width': 1440, 'height': 900}
-        )
-        page = browser.pages[0]
+        def launch(p):
+            print(f"Launching browser: {USER_DATA_DIR}")
+            return p.chromium.launch_persistent_context(
+                USER_DATA_DIR, 
+                headless=False, 
+                viewport={'width': 1440, 'height': 900}
+            )
+        # Reuses the warm wechat browser service when it is running
+        browser, page, owns_browser = open_session(p, "wechat", launch)
         
         print(f"Navigating to {WECHAT_URL}...")
         page.goto(WECHAT_URL)
@@ -202,7 +205,10 @@ def run_scraper():
                 time.sleep(2)
 
         print("\nAll tasks finished.")
-        browser.close()
+        if owns_browser:
+            browser.close()
+        else:
+            page.close()
 
 if __name__ == "__main__":
     run_scraper()
@@ -0,0 +1,19 @@
+from analyze_comments import iter_thread_comments
+
+# Reply depths inside a thread, as the streaming analyzer reports them.
+#
+#   python test_analyze_comments.py
+
+def test_reply_to_author_keeps_depth():
+    top = {"user": "Host [Author]", "content": "视频说明"}
+    replies = [
+        {"user": "A", "content": "问题"},
+        {"user": "Host [Author]", "reply_to": "A", "content": "回答"},
+        {"user": "B", "reply_to": "Host [Author]", "content": "追问"},
+        {"user": "C", "reply_to": "Host", "content": "cleaned name"},
+    ]
+    assert [depth for depth, _ in iter_thread_comments(top, replies)] == [0, 1, 2, 3, 3]
+
+if __name__ == "__main__":
+    test_reply_to_author_keeps_depth()
+    print("OK")
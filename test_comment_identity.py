@@ -0,0 +1,47 @@
+import os
+import tempfile
+
+from comment_identity import SeenSet
+
+# Comment identity: native cids decide, fingerprints bridge records without one.
+#
+#   python test_comment_identity.py
+
+def _comment(cid=None, content="+1", time="1分钟前"):
+    record = {"user": "u", "content": content, "location": "北京", "time": time}
+    if cid:
+        record["cid"] = cid
+    return record
+
+def test_distinct_cids_with_identical_text_are_kept():
+    seen = SeenSet()
+    assert seen.add_record(_comment("111"))
+    assert seen.add_record(_comment("222", time="2分钟前"))
+    assert not seen.add_record(_comment("111"))
+    assert len(seen) == 3  # two cids plus the shared fingerprint
+
+def test_cidless_and_cid_records_of_one_comment_match():
+    # DOM record without a cid first (e.g. a resumed older scrape), API record later
+    seen = SeenSet()
+    assert seen.add_record(_comment(content="同一条评论"))
+    assert not seen.add_record(_comment("333", content="同一条评论"))
+    # And the other way round
+    seen = SeenSet()
+    assert seen.add_record(_comment("444", content="另一条"))
+    assert not seen.add_record(_comment(content="另一条"))
+
+def test_save_load_round_trip():
+    seen = SeenSet.from_records([_comment("1"), _comment("2"), _comment(content="x")])
+    path = os.path.join(tempfile.mkdtemp(), "seen_keys.bin")
+    seen.save(path, 3)
+    loaded = SeenSet.load(path, 3)
+    assert loaded is not None and len(loaded) == len(seen)
+    assert not loaded.add_record(_comment("2"))
+    assert loaded.add_record(_comment("5"))
+    assert SeenSet.load(path, 4) is None
+
+if __name__ == "__main__":
+    test_distinct_cids_with_identical_text_are_kept()
+    test_cidless_and_cid_records_of_one_comment_match()
+    test_save_load_round_trip()
+    print("OK")
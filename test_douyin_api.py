@@ -0,0 +1,107 @@
+import json
+import os
+import tempfile
+import urllib.request
+
+from douyin_api import CommentResponseCollector, replay_fixtures
+from douyin_fixture_server import FixtureConfig, start_fixture_server
+
+# Network capture without a browser: comment / reply list responses from the
+# stand-in server are recorded the way RECORD_API_DIR does and replayed through
+# the collector.
+#
+#   python test_douyin_api.py
+
+CONFIG = dict(comments=45, page_size=20, reply_ratio=0.5, max_replies=25, reply_page_size=10, latency_ms=0)
+
+def _fetch(base_url, path):
+    url = base_url + path
+    with urllib.request.urlopen(url) as response:
+        return url, json.load(response)
+
+def _record(fixture_dir, responses):
+    paths = []
+    for n, (url, body) in enumerate(responses):
+        path = os.path.join(fixture_dir, f"{n:05d}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"url": url, "body": body}, f, ensure_ascii=False)
+        paths.append(path)
+    return paths
+
+def _comment_pages(base_url, config):
+    return [_fetch(base_url, f"/aweme/v1/web/comment/list/?aweme_id=t&cursor={cursor}&count={config.page_size}")
+            for cursor in range(0, config.comments, config.page_size)]
+
+def _reply_pages(base_url, config, cid, total):
+    return [_fetch(base_url, f"/aweme/v1/web/comment/list/reply/?item_id=t&comment_id={cid}"
+                             f"&cursor={cursor}&count={config.reply_page_size}")
+            for cursor in range(0, total, config.reply_page_size)]
+
+def test_replayed_comment_pages():
+    config = FixtureConfig(**CONFIG)
+    server, base_url = start_fixture_server(config)
+    try:
+        pages = _comment_pages(base_url, config)
+    finally:
+        server.shutdown()
+    paths = _record(tempfile.mkdtemp(prefix="douyin_api_"), pages)
+
+    first = replay_fixtures(paths[:1])
+    assert len(first.threads) == config.page_size
+    assert not first.exhausted
+
+    collector = replay_fixtures(paths)
+    assert collector.exhausted  # last page reports has_more 0
+    assert len(collector.threads) == config.comments
+    record = collector.threads[str(7000000000000000000 + 3)]
+    assert record["reply_count"] == config.reply_total(3)
+    assert record["replies_scraped"] == (record["reply_count"] == 0)
+    assert record["time"] and record["location"]
+
+    # Pages seen again count toward the known streak and report moved reply counts
+    url, body = pages[0]
+    body["comments"][0]["reply_comment_total"] += 2
+    assert collector.ingest(url, body) == []
+    assert collector.known_streak == config.page_size
+    assert collector.reply_count_changes == [(body["comments"][0]["cid"], body["comments"][0]["reply_comment_total"])]
+
+def test_reply_pages_merge_and_notify():
+    config = FixtureConfig(**CONFIG)
+    index = next(i for i in range(config.comments) if config.reply_total(i) > config.reply_page_size)
+    total = config.reply_total(index)
+    cid = str(7000000000000000000 + index)
+    server, base_url = start_fixture_server(config)
+    try:
+        list_page = _fetch(base_url, f"/aweme/v1/web/comment/list/?aweme_id=t&cursor={index}&count=1")
+        reply_pages = _reply_pages(base_url, config, cid, total)
+    finally:
+        server.shutdown()
+
+    notified = []
+    collector = CommentResponseCollector(on_replies=lambda record: notified.append(
+        (len(record["replies"]), record["replies_scraped"])))
+    fresh = collector.ingest(*list_page)
+    assert [r["cid"] for r in fresh] == [cid]
+    thread = fresh[0]
+
+    for n, page in enumerate(reply_pages):
+        collector.ingest(*page)
+        assert notified[-1] == (len(thread["replies"]), n == len(reply_pages) - 1)
+    assert len(notified) == len(reply_pages)
+    assert len(thread["replies"]) == total
+    assert thread["replies_scraped"]
+    assert all(r["replies_scraped"] for r in thread["replies"])
+
+    # A repeated non-final page adds nothing, so nobody is notified
+    collector.ingest(*reply_pages[0])
+    assert len(notified) == len(reply_pages)
+    assert len(thread["replies"]) == total
+
+    # Replies for a thread the collector has never seen are ignored
+    url, body = reply_pages[0]
+    assert collector.ingest(url.replace(cid, "123"), body) == []
+
+if __name__ == "__main__":
+    test_replayed_comment_pages()
+    test_reply_pages_merge_and_notify()
+    print("OK")
@@ -0,0 +1,73 @@
+import asyncio
+import os
+import tempfile
+
+from playwright.async_api import async_playwright
+
+from douyin_fixture_server import FixtureConfig, start_fixture_server
+from comment_identity import content_fingerprint
+from page_waits import Pacing, act_and_wait
+from reply_harvest import harvest_replies
+from scrape_douyin import ScrollContainer, extract_visible_comments, launch_douyin_context, open_comment_panel
+
+# Reply tabs start on a fresh page with only the first lazy page of comments
+# loaded; threads assigned deeper in the list must still be found and expanded.
+#
+#   BROWSER_CHANNEL= python test_reply_harvest.py
+
+async def _list_positions(page, container, pacing):
+    """Scrolls the whole list like Phase 1 does; returns {fingerprint: (offset, reply_count)}."""
+    positions = {}
+    idle = 0
+    while idle < 3:
+        before = len(positions)
+        for record, raw in await extract_visible_comments(page, with_raw=True):
+            if raw.get("offset") is not None:
+                positions.setdefault(content_fingerprint(record), (raw["offset"], raw.get("reply_count") or 0))
+        idle = idle + 1 if len(positions) == before else 0
+        await act_and_wait(await container.element(), container.scroll_to_bottom,
+                           pacing.scroll_timeout, pacing.scroll_floor, pacing)
+    return positions
+
+async def _harvest_past_first_page(url):
+    async with async_playwright() as p:
+        context = await launch_douyin_context(p, tempfile.mkdtemp(prefix="douyin_harvest_"))
+        try:
+            page = context.pages[0] if context.pages else await context.new_page()
+            pacing = Pacing.from_env()
+            await page.goto(url, timeout=60000)
+            await open_comment_panel(page, pacing)
+            container = ScrollContainer(page)
+            assert await container.resolve()
+            first_page_height = await container.scroll_by(0)
+
+            positions = await _list_positions(page, container, pacing)
+            assert max(offset for offset, _ in positions.values()) > first_page_height
+            deep = [(fp, count, offset) for fp, (offset, count) in positions.items()
+                    if offset > first_page_height and count]
+            assert len(deep) >= 10
+
+            results = {}
+            async def collect(fp, replies):
+                results[fp] = replies
+            reported = await harvest_replies(context, url, deep, 2, None, collect)
+            assert reported == len(deep)
+            missed = [fp for fp, count, _ in deep if results.get(fp) is None]
+            assert not missed, f"{len(missed)}/{len(deep)} deep threads not found"
+            for fp, count, _ in deep:
+                assert len(results[fp]) == count
+        finally:
+            await context.close()
+
+def test_harvest_past_first_page():
+    os.environ.setdefault("HEADLESS", "true")
+    config = FixtureConfig(comments=120, page_size=20, reply_ratio=0.5, max_replies=12, latency_ms=30)
+    server, base_url = start_fixture_server(config)
+    try:
+        asyncio.run(_harvest_past_first_page(f"{base_url}/video/harvest-test"))
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    test_harvest_past_first_page()
+    print("OK")
@@ -0,0 +1,52 @@
+import tempfile
+
+import video_ids
+from douyin_fixture_server import FixtureConfig, start_fixture_server
+from scrape_catalog import ScrapeCatalog
+from video_ids import extract_video_id, remember_final_url, resolve_video_id
+
+# Canonical video ids against the stand-in server's short links: /s/<id>
+# redirects to /share/video/<id>/, which redirects to /video/<id>.
+#
+#   python test_video_ids.py
+
+def test_direct_urls_need_no_lookup():
+    assert extract_video_id("https://www.douyin.com/video/7312345678901234567") == "7312345678901234567"
+    assert extract_video_id("https://www.douyin.com/discover?modal_id=7312345678901234567") == "7312345678901234567"
+    assert extract_video_id("https://v.douyin.com/sUt6tM1Aaic/") is None
+
+def test_short_link_resolves_once_then_hits_the_cache():
+    server, base_url = start_fixture_server(FixtureConfig(comments=1, latency_ms=0))
+    catalog = ScrapeCatalog(tempfile.mkdtemp(prefix="douyin_ids_"))
+    short_link = f"{base_url}/s/7399999999999999999/"
+    try:
+        assert resolve_video_id(short_link, catalog) == "7399999999999999999"
+    finally:
+        server.shutdown()
+
+    follow_redirects = video_ids.follow_redirects
+    def no_http(url, timeout=10):
+        raise AssertionError(f"{url} should have come from the cache")
+    video_ids.follow_redirects = no_http
+    try:
+        assert resolve_video_id(short_link, catalog) == "7399999999999999999"
+        assert resolve_video_id(short_link.rstrip("/"), catalog) == "7399999999999999999"
+    finally:
+        video_ids.follow_redirects = follow_redirects
+        catalog.close()
+
+def test_browser_landing_url_is_remembered():
+    catalog = ScrapeCatalog(tempfile.mkdtemp(prefix="douyin_ids_"))
+    try:
+        short_link = "https://v.douyin.com/abcDEF/"
+        assert remember_final_url(short_link, "https://www.douyin.com/video/7311111111111111111", catalog) \
+            == "7311111111111111111"
+        assert resolve_video_id(short_link, catalog) == "7311111111111111111"
+    finally:
+        catalog.close()
+
+if __name__ == "__main__":
+    test_direct_urls_need_no_lookup()
+    test_short_link_resolves_once_then_hits_the_cache()
+    test_browser_landing_url_is_remembered()
+    print("OK")
@@ -0,0 +1,111 @@
+import os
+import re
+import sys
+from urllib.parse import urlparse, parse_qs
+
+import requests
+
+from scrape_catalog import ScrapeCatalog
+
+# Canonical video ids. The same video is reachable as a v.douyin.com short link,
+# /video/<aweme_id>, /share/video/<aweme_id>/ or a page with ?modal_id=<aweme_id>;
+# everything keyed by video (scraped_data/<id>/, the catalog, resume state) uses
+# the aweme id so all of them land in one place. Short links are resolved by
+# following their redirects once; the result is cached in the scrape catalog.
+# load_urls / dedupe_by_video turn URL lists into one URL per video for batch runs.
+
+_ID_IN_PATH = re.compile(r"/(?:share/)?(?:video|note)/([\w-]+)")
+_ID_QUERY_KEYS = ("modal_id", "aweme_id", "vid")
+_USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+def extract_video_id(url):
+    """Returns the aweme id if it is visible in url itself, else None."""
+    parsed = urlparse(url)
+    query = parse_qs(parsed.query)
+    for key in _ID_QUERY_KEYS:
+        if query.get(key):
+            return query[key][0]
+    match = _ID_IN_PATH.search(parsed.path)
+    return match.group(1) if match else None
+
+def _cache_key(url):
+    parsed = urlparse(url)
+    return f"{parsed.netloc}{parsed.path.rstrip('/')}"
+
+def follow_redirects(url, timeout=10):
+    """Follows url's redirect chain; returns the first aweme id seen along it, or None."""
+    try:
+        response = requests.get(url, headers={"User-Agent": _USER_AGENT}, timeout=timeout,
+                                allow_redirects=True, stream=True)
+        response.close()
+    except requests.RequestException as e:
+        print(f"Could not resolve {url}: {e}")
+        return None
+    hops = [r.headers.get("Location", "") for r in response.history] + [response.url]
+    for hop in hops:
+        video_id = extract_video_id(hop)
+        if video_id:
+            return video_id
+    return None
+
+def resolve_video_id(url, catalog=None):
+    """Returns the canonical video id for url.
+
+    Direct video URLs cost nothing; short links are looked up in the catalog's
+    short_links cache, then resolved over HTTP and cached. Falls back to the
+    last path segment (the old directory naming) if nothing else works.
+    """
+    video_id = extract_video_id(url)
+    if video_id:
+        return video_id
+    key = _cache_key(url)
+    if catalog:
+        video_id = catalog.cached_video_id(key)
+        if video_id:
+            return video_id
+    video_id = follow_redirects(url)
+    if video_id:
+        if catalog:
+            catalog.remember_video_id(key, video_id)
+        return video_id
+    path = urlparse(url).path.strip('/')
+    return path.split('/')[-1] if path else "default"
+
+def remember_final_url(url, final_url, catalog):
+    """Caches the id a browser navigation landed on, for short links HTTP could not resolve."""
+    video_id = extract_video_id(final_url)
+    if video_id and not extract_video_id(url):
+        catalog.remember_video_id(_cache_key(url), video_id)
+    return video_id
+
+def load_urls(args_urls, url_file=None):
+    """Collects URLs from the command line and/or a file (one per line, # comments allowed)."""
+    urls = list(args_urls or [])
+    if url_file:
+        with open(url_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    urls.append(line)
+    # Keep order, drop duplicates
+    return list(dict.fromkeys(urls))
+
+def dedupe_by_video(urls):
+    """Drops URLs that resolve to a video already in the list (e.g. a short link and its /video/ URL)."""
+    catalog = ScrapeCatalog(os.path.join(os.getcwd(), "scraped_data"))
+    try:
+        by_video = {}
+        for url in urls:
+            video_id = resolve_video_id(url, catalog)
+            if video_id in by_video:
+                print(f"Skipping {url}: same video as {by_video[video_id]}")
+                continue
+            by_video[video_id] = url
+        return list(by_video.values())
+    finally:
+        catalog.close()
+
+if __name__ == "__main__":
+    # Usage: python video_ids.py <url> [<url> ...]
+    for arg in sys.argv[1:]:
+        print(f"{resolve_video_id(arg)}\t{arg}")